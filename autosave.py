@@ -0,0 +1,240 @@
+"""자동 저장
+
+서버가 다시 시작되거나 세션이 끊겨도 입력이 남도록 프로젝트별로 SQLite
+(WAL 모드) 파일에 저장한다. 매 실행마다 전체를 다시 쓰지 않고, 입력값을
+'form_data/company_name', 'process/<공정 id>/qty' 같은 키 단위로 펼쳐 이전
+실행과 달라진 키만 저널에 추가한다. 저널이 길어지면 스냅숏 하나로 합친다.
+
+복구는 마지막 스냅숏 + 그 뒤의 저널을 순서대로 적용한다. 사진은 내용
+해시별로 한 번만 저장한다.
+
+RISK_AUTOSAVE=0 으로 띄우면 자동 저장을 쓰지 않는다.
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+import zlib
+
+from photo_pipeline import PhotoStore, ProcessPhoto
+from project_store import restore_state, snapshot_state
+
+ENV_VAR = 'RISK_AUTOSAVE'
+DEFAULT_PATH = os.environ.get(
+    'RISK_AUTOSAVE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'autosave.sqlite3'),
+)
+
+# 스냅숏 이후 저널이 이만큼 쌓이면 스냅숏으로 합친다
+COMPACT_THRESHOLD = 500
+# 이 기간 동안 저장이 없던 프로젝트는 지운다
+RETENTION_SECONDS = 30 * 24 * 60 * 60
+
+# 펼친 키 중 입력 섹션 (섹션 안의 항목 하나가 키 하나)
+SECTIONS = ('form_data', 'business_info', 'hazard_info')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    project_id TEXT PRIMARY KEY,
+    journal_seq INTEGER NOT NULL,  -- 이 스냅숏에 반영된 마지막 저널 seq
+    data BLOB NOT NULL,            -- 펼친 입력값 json (zlib)
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,                    -- json, NULL 이면 키 삭제
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS journal_project ON journal (project_id, seq);
+CREATE TABLE IF NOT EXISTS photos (
+    project_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    data BLOB NOT NULL,
+    thumbnail BLOB NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    PRIMARY KEY (project_id, digest)
+);
+"""
+
+
+def flatten_snapshot(snapshot):
+    """project_store.snapshot_state() 결과 -> {키: 값}"""
+    flat = {'meta': {'format': snapshot['format'], 'version': snapshot['version']}}
+    for section in SECTIONS:
+        for key, value in (snapshot.get(section) or {}).items():
+            flat[f'{section}/{key}'] = value
+    columns = snapshot['processes']
+    flat['process_order'] = list(columns['id'])
+    for idx, process_id in enumerate(columns['id']):
+        for field, column in columns.items():
+            if field != 'id':
+                flat[f'process/{process_id}/{field}'] = column[idx]
+    for process_id, classification in snapshot['hazard_classifications'].items():
+        flat[f'hazard/{process_id}'] = classification
+    flat['photos'] = snapshot['photos']
+    return flat
+
+
+def unflatten_snapshot(flat):
+    """flatten_snapshot() 의 반대"""
+    snapshot = dict(flat['meta'])
+    for section in SECTIONS:
+        snapshot[section] = {}
+    process_fields = {}
+    snapshot['hazard_classifications'] = {}
+    for key, value in flat.items():
+        kind, _, rest = key.partition('/')
+        if kind in SECTIONS:
+            snapshot[kind][rest] = value
+        elif kind == 'process':
+            process_id, _, field = rest.partition('/')
+            process_fields.setdefault(field, {})[process_id] = value
+        elif kind == 'hazard':
+            snapshot['hazard_classifications'][rest] = value
+    order = flat['process_order']
+    columns = {'id': list(order)}
+    for field, values in process_fields.items():
+        columns[field] = [values.get(process_id) for process_id in order]
+    snapshot['processes'] = columns
+    snapshot['photos'] = flat.get('photos', {})
+    return snapshot
+
+
+# json.dumps 에 옵션을 주면 부를 때마다 인코더를 새로 만들므로 하나를 같이 쓴다
+_encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # WAL 에서는 NORMAL 이어도 전원 차단 외에는 커밋이 유실되지 않는다
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+@contextlib.contextmanager
+def _transaction(path):
+    """커밋(오류면 롤백)하고 연결을 닫는다"""
+    conn = _connect(path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def enabled(environ=os.environ):
+    return environ.get(ENV_VAR, '').strip().lower() not in ('0', 'false', 'off')
+
+
+class Autosave:
+    """세션 하나(프로젝트 id 하나)의 자동 저장"""
+
+    def __init__(self, path=DEFAULT_PATH, project_id=None):
+        self.path = path
+        self.project_id = project_id or uuid.uuid4().hex
+        # 마지막으로 저장한 펼친 입력값 (json 문자열 - 세션 상태의 list/dict 를 제자리에서
+        # 바꿔도 비교할 수 있도록 값을 그대로 들고 있지 않는다)
+        self.last = {}
+        self.photo_digests = set()  # 저장한 사진
+        self.pending = 0  # 스냅숏 이후 저널 수
+        with _transaction(self.path) as conn:
+            conn.executescript(_SCHEMA)
+
+    def recover(self):
+        """저장된 입력이 있으면 세션 상태에 넣을 {키: 값} ('photos' 포함), 없으면 None"""
+        with _transaction(self.path) as conn:
+            row = conn.execute('SELECT journal_seq, data FROM snapshots WHERE project_id = ?',
+                               (self.project_id,)).fetchone()
+            journal_seq, flat = (row[0], json.loads(zlib.decompress(row[1]))) if row else (0, {})
+            entries = conn.execute(
+                'SELECT key, value FROM journal WHERE project_id = ? AND seq > ? ORDER BY seq',
+                (self.project_id, journal_seq)).fetchall()
+            for key, value in entries:
+                if value is None:
+                    flat.pop(key, None)
+                else:
+                    flat[key] = json.loads(value)
+            if 'meta' not in flat:
+                return None
+
+            state = restore_state(unflatten_snapshot(flat))
+            photos = PhotoStore()
+            for digest, data, thumbnail, width, height in conn.execute(
+                    'SELECT digest, data, thumbnail, width, height FROM photos WHERE project_id = ?',
+                    (self.project_id,)):
+                photos.add(ProcessPhoto(digest, thumbnail, data, width, height))
+        state['photos'] = photos
+        self.last = {key: _encode(value) for key, value in flat.items()}
+        self.photo_digests = set(photos.photos)
+        self.pending = len(entries)
+        return state
+
+    def record(self, state):
+        """이전 저장 이후 달라진 키만 저널에 추가하고, 추가한 키 수를 돌려준다"""
+        snapshot = snapshot_state(state)
+        encoded = {key: _encode(value) for key, value in flatten_snapshot(snapshot).items()}
+        changes = [(key, value) for key, value in encoded.items() if self.last.get(key) != value]
+        changes.extend((key, None) for key in self.last if key not in encoded)
+        if not changes:
+            return 0
+
+        now = time.time()
+        photos = state.get('photos')
+        new_digests = [digest for digest in snapshot['photos'] if digest not in self.photo_digests]
+        with _transaction(self.path) as conn:
+            conn.executemany(
+                'INSERT INTO journal (project_id, key, value, updated) VALUES (?, ?, ?, ?)',
+                [(self.project_id, key, value, now) for key, value in changes])
+            for digest in new_digests:
+                photo = photos.get(digest)
+                conn.execute(
+                    'INSERT OR IGNORE INTO photos (project_id, digest, data, thumbnail, width, height)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    (self.project_id, digest, photo.data, photo.thumbnail, photo.width, photo.height))
+        self.last = encoded
+        self.photo_digests.update(new_digests)
+        self.pending += len(changes)
+        if self.pending >= COMPACT_THRESHOLD:
+            self.compact()
+        return len(changes)
+
+    def compact(self):
+        """지금까지의 입력을 스냅숏 하나로 합치고 반영된 저널과 쓰지 않는 사진을 지운다"""
+        flat = '{' + ','.join(f'{_encode(key)}:{value}' for key, value in self.last.items()) + '}'
+        data = zlib.compress(flat.encode('utf-8'))
+        with _transaction(self.path) as conn:
+            journal_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM journal WHERE project_id = ?',
+                                       (self.project_id,)).fetchone()[0]
+            conn.execute(
+                'INSERT OR REPLACE INTO snapshots (project_id, journal_seq, data, updated) VALUES (?, ?, ?, ?)',
+                (self.project_id, journal_seq, data, time.time()))
+            conn.execute('DELETE FROM journal WHERE project_id = ? AND seq <= ?',
+                         (self.project_id, journal_seq))
+            used = list(json.loads(self.last.get('photos', '{}')))
+            conn.execute(
+                f"DELETE FROM photos WHERE project_id = ? AND digest NOT IN ({','.join('?' * len(used))})",
+                (self.project_id, *used))
+        self.photo_digests = set(used)
+        self.pending = 0
+
+
+def purge(path=DEFAULT_PATH, older_than=RETENTION_SECONDS):
+    """older_than 초 동안 저장이 없던 프로젝트를 지운다"""
+    cutoff = time.time() - older_than
+    with _transaction(path) as conn:
+        conn.executescript(_SCHEMA)
+        stale = [row[0] for row in conn.execute(
+            'SELECT project_id FROM ('
+            '  SELECT project_id, updated FROM snapshots'
+            '  UNION ALL SELECT project_id, updated FROM journal'
+            ') GROUP BY project_id HAVING MAX(updated) < ?', (cutoff,))]
+        for project_id in stale:
+            for table in ('snapshots', 'journal', 'photos'):
+                conn.execute(f'DELETE FROM {table} WHERE project_id = ?', (project_id,))
+    return stale
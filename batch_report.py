@@ -0,0 +1,92 @@
+"""여러 사업장의 위험성평가 결과서를 한 번에 만드는 명령
+
+    python batch_report.py 프로젝트_폴더 [-o 출력_폴더] [--engine xlsxwriter] [--workers 8]
+
+폴더 안의 프로젝트 파일(.rap)마다 화면의 '위험성평가 결과서 전체 저장'과
+같은 결과서(<파일 이름>.xlsx)를 만든다. 파일 하나를 통째로 한 프로세스가
+맡으므로 (불러오기 + 엑셀 생성 모두 CPU 작업) 코어 수만큼 빨라진다.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from excel_export import ENGINE_OPENPYXL, ENGINES, REPORT_SHEETS, SHEET_COVER, build_workbook
+from project_store import PROJECT_EXTENSION, load_project
+
+
+def find_projects(directory):
+    """directory 바로 아래의 프로젝트 파일 경로 (이름 순)"""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(f'.{PROJECT_EXTENSION}') and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def build_report(project_path, output_dir, engine=ENGINE_OPENPYXL, sheets=REPORT_SHEETS):
+    """프로젝트 파일 하나 -> 결과서 xlsx 파일, (출력 경로, 걸린 초) 를 돌려준다"""
+    started = time.perf_counter()
+    with open(project_path, 'rb') as f:
+        state = load_project(f.read())
+    # 표지를 한 번도 입력하지 않은 프로젝트에는 표지 입력값이 없다
+    if 'form_data' not in state:
+        sheets = [kind for kind in sheets if kind != SHEET_COVER]
+
+    data = build_workbook(state, sheets, engine=engine)
+    name = os.path.splitext(os.path.basename(project_path))[0]
+    output_path = os.path.join(output_dir, f'{name}.xlsx')
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return output_path, time.perf_counter() - started
+
+
+def build_reports(project_paths, output_dir, engine=ENGINE_OPENPYXL, workers=None):
+    """여러 프로젝트를 프로세스 풀에서 나눠 만든다
+
+    끝나는 대로 (프로젝트 경로, 출력 경로 또는 None, 걸린 초 또는 오류 메시지) 를 내준다.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_report, path, output_dir, engine): path for path in project_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                output_path, seconds = future.result()
+            except (OSError, ValueError) as e:
+                yield path, None, str(e)
+            except Exception as e:
+                # 형식이 어긋난 파일이나 작업 프로세스가 죽은 경우도 그 파일만 실패로 남기고 계속한다
+                yield path, None, f'{type(e).__name__}: {e}'
+            else:
+                yield path, output_path, seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="프로젝트 파일(.rap) 폴더의 위험성평가 결과서를 한 번에 만든다")
+    parser.add_argument('directory', help="프로젝트 파일 폴더")
+    parser.add_argument('-o', '--output', help="결과서를 저장할 폴더 (기본: 프로젝트 폴더)")
+    parser.add_argument('--engine', choices=ENGINES, default=ENGINE_OPENPYXL, help="엑셀 엔진")
+    parser.add_argument('--workers', type=int, default=None, help="동시에 돌릴 프로세스 수 (기본: 코어 수)")
+    args = parser.parse_args(argv)
+
+    projects = find_projects(args.directory)
+    if not projects:
+        print(f"{args.directory} 에 프로젝트 파일(.{PROJECT_EXTENSION})이 없습니다", file=sys.stderr)
+        return 1
+    output_dir = args.output or args.directory
+    os.makedirs(output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    failed = 0
+    for path, output_path, result in build_reports(projects, output_dir, args.engine, args.workers):
+        if output_path is None:
+            failed += 1
+            print(f"실패  {path}: {result}", file=sys.stderr)
+        else:
+            print(f"완료  {output_path} ({result:.2f}초)")
+    print(f"{len(projects) - failed}/{len(projects)}개 결과서 ({time.perf_counter() - started:.2f}초)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""엑셀 내보내기 벤치마크
+
+공정 수를 바꿔 가며 가짜 프로젝트를 만들고, 탭별 저장 버튼과 전체 결과서가
+만드는 엑셀을 엔진마다 생성해 걸린 시간과 tracemalloc 최대 메모리를 잰다.
+결과는 json 으로 저장하고, 이전 결과를 주면 느려진 항목을 알려 준다.
+
+    python benchmark.py --sizes 50 500 5000 --photos 20 -o bench.json
+    python benchmark.py --compare bench.json      # 기준보다 느려졌으면 종료 코드 1
+
+시간은 tracemalloc 을 끈 상태에서 repeat 번 재서 가장 짧은 값과 중앙값을,
+메모리는 따로 한 번 더 만들면서 잰다 (tracemalloc 이 켜져 있으면 느려지므로).
+"""
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import openpyxl
+import xlsxwriter
+from PIL import Image
+
+from excel_export import (
+    ENGINES, REPORT_SHEETS, SHEET_BUSINESS, SHEET_CLASSIFICATION, SHEET_COVER, SHEET_HAZARD_INFO,
+    SHEET_SUMMARY, build_workbook,
+)
+from export_cache import HAZARD_INFO_TOP_KEYS
+from hazard_info_table import YES_NO_FIELDS, YES_NO_OPTIONS
+from hazard_taxonomy import TAXONOMY
+from photo_pipeline import PhotoStore
+from process_table import HAZARD_INFO_FIELDS, ProcessTable
+
+# 측정하는 내보내기 (화면의 저장 버튼과 같은 시트 묶음)
+EXPORTS = {
+    'cover': (SHEET_COVER,),
+    'business': (SHEET_BUSINESS,),
+    'hazard_info': (SHEET_HAZARD_INFO,),
+    'classification': (SHEET_CLASSIFICATION, SHEET_SUMMARY),
+    'report': REPORT_SHEETS,
+}
+
+DEFAULT_SIZES = (50, 500)
+# --compare 에서 이 배수보다 느리면 느려진 것으로 본다
+DEFAULT_THRESHOLD = 1.25
+
+
+def _synthetic_photo(rng, size=(1600, 1200)):
+    """사진처럼 잘 압축되지 않는 JPEG 원본 (색 블록 + 잡음)"""
+    image = Image.effect_noise(size, rng.randint(20, 80)).convert('RGB')
+    overlay = Image.new('RGB', (8, 6), tuple(rng.randrange(256) for _ in range(3)))
+    image = Image.blend(image, overlay.resize(size), 0.5)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def synthetic_state(process_count, photo_count=0, check_ratio=0.3, seed=0, taxonomy=TAXONOMY):
+    """공정 process_count 개짜리 가짜 세션 상태 (사진은 photo_count 장을 돌려 쓴다)"""
+    rng = random.Random(seed)
+    photos = PhotoStore()
+    digests = [photos.ingest(_synthetic_photo(rng)) for _ in range(photo_count)]
+
+    processes = ProcessTable()
+    classifications = {}
+    for idx in range(process_count):
+        values = {
+            'name': f'공정{idx + 1}',
+            'photo': digests[idx % len(digests)] if digests else None,
+            'description': '원자재를 절단하고 용접한 뒤 도장한다' * rng.randint(1, 3),
+            'equipment': ', '.join(rng.sample(['절단기', '용접기', '지게차', '크레인', '프레스', '연삭기'], 2)),
+            'hazardous_material': rng.choice(['', '톨루엔', '아세톤', '용접흄']),
+            'hazardous_factor': rng.choice(['끼임', '떨어짐', '화재', '소음']),
+        }
+        for field in HAZARD_INFO_FIELDS:
+            values[field] = rng.choice(YES_NO_OPTIONS) if field in YES_NO_FIELDS else str(rng.randint(0, 30))
+        processes.append(**values)
+
+        mask = 0
+        for position in range(len(taxonomy)):
+            if rng.random() < check_ratio:
+                mask |= 1 << position
+        classifications[processes[idx]['id']] = {
+            'manufacturing_process': f'제조공정{idx // 10 + 1}',
+            'classification_code': f'C{idx:04d}',
+            'checked': mask,
+        }
+
+    state = {
+        'form_data': {
+            'year': '24',
+            'company_name': '가상 제조(주)',
+            'address': '서울시 어딘가',
+            'phone': '02-000-0000',
+            'fax': '02-000-0001',
+            'approvers': [{'position': position, 'name': f'결재자{i}'}
+                          for i, position in enumerate(['담당', '팀장', '부장', '대표'])],
+        },
+        'business_info': {
+            'business_name': '가상 제조(주)',
+            'main_product': '금속 부품',
+            'evaluation_date': date(2024, 1, 2),
+            'representative': '대표자',
+            'employee_count': '120',
+            'evaluator': '평가자',
+        },
+        'processes': processes,
+        'hazard_classifications': classifications,
+        'photos': photos,
+    }
+    for key in HAZARD_INFO_TOP_KEYS:
+        state[key] = f'{key} 값'
+    return state
+
+
+def measure(state, sheets, engine, repeat=3):
+    """(가장 짧은 초, 중앙값 초, tracemalloc 최대 바이트, xlsx 바이트 수)"""
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = build_workbook(state, sheets, engine=engine)
+        seconds.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        build_workbook(state, sheets, engine=engine)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(seconds), statistics.median(seconds), peak, len(data)
+
+
+def run(sizes=DEFAULT_SIZES, engines=ENGINES, exports=tuple(EXPORTS), photo_count=0, repeat=3, seed=0,
+        log=None):
+    """벤치마크 결과 dict (json 으로 저장할 수 있는 형태)"""
+    results = []
+    for size in sizes:
+        state = synthetic_state(size, photo_count, seed=seed)
+        for engine in engines:
+            for name in exports:
+                best, median, peak, xlsx_bytes = measure(state, EXPORTS[name], engine, repeat)
+                result = {
+                    'processes': size,
+                    'photos': photo_count,
+                    'engine': engine,
+                    'export': name,
+                    'seconds_min': round(best, 4),
+                    'seconds_median': round(median, 4),
+                    'peak_bytes': peak,
+                    'xlsx_bytes': xlsx_bytes,
+                }
+                results.append(result)
+                if log:
+                    log(result)
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'openpyxl': openpyxl.__version__,
+        'xlsxwriter': xlsxwriter.__version__,
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+# 같은 측정인지 가리는 결과 항목과 비교할 값
+RESULT_KEYS = ('processes', 'photos', 'engine', 'export')
+RESULT_METRICS = ('seconds_min', 'peak_bytes')
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, keys=RESULT_KEYS, metrics=RESULT_METRICS):
+    """baseline 보다 metrics 값이 threshold 배를 넘은 항목 [(결과, 항목, 기준값, 현재값)]"""
+    previous = {tuple(result[key] for key in keys): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(tuple(result[key] for key in keys))
+        if before is None:
+            continue
+        for metric in metrics:
+            if before[metric] and result[metric] > before[metric] * threshold:
+                regressions.append((result, metric, before[metric], result[metric]))
+    return regressions
+
+
+def _print_result(result):
+    print(f"{result['processes']:>6}공정 사진{result['photos']:>3}  {result['engine']:<10} "
+          f"{result['export']:<14} {result['seconds_min']:>8.3f}초 (중앙 {result['seconds_median']:.3f}) "
+          f"최대 {result['peak_bytes'] / 2**20:>8.1f}MB  파일 {result['xlsx_bytes'] / 2**10:>8.0f}KB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="엑셀 내보내기 시간 / 메모리 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="공정 수")
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    parser.add_argument('--exports', nargs='+', choices=list(EXPORTS), default=list(EXPORTS))
+    parser.add_argument('--photos', type=int, default=0, help="가짜 공정 사진 수 (공정마다 돌려 쓴다)")
+    parser.add_argument('--repeat', type=int, default=3, help="시간 측정 반복 수")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="결과 json 파일")
+    parser.add_argument('--compare', help="기준 결과 json - 느려진 항목이 있으면 종료 코드 1")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="느려진 것으로 보는 배수 (기본 %(default)s)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.engines, args.exports, args.photos, args.repeat, args.seed,
+                 log=_print_result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for result, metric, before, after in regressions:
+            print(f"느려짐  {result['processes']}공정 {result['engine']} {result['export']} "
+                  f"{metric}: {before} -> {after}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
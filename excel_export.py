@@ -0,0 +1,689 @@
+"""위험성평가 결과서 엑셀 내보내기
+
+표지 / 사업장정보 / 공정정보 / 공정도 / 위험정보 / 유해위험요인분류 / 요약
+시트를 하나의 워크북에서 한 번에 생성한다. 시트 빌더는 세션 상태가 아니라
+report_model.Report 를 읽는다 (render_workbook). 서식 객체는 모듈 로드 시 한
+번만 만들어 모든 시트와 셀이 공유한다. 공정 사진은 photo_pipeline 에서 미리
+줄여 둔 JPEG 를 그대로 넣는다.
+
+시트 빌더는 행 순서대로만 쓰므로 두 가지 엔진 중 하나를 고를 수 있다.
+- openpyxl: 셀 객체를 메모리에 모두 만든 뒤 저장 (기본)
+- xlsxwriter: constant_memory 모드로 한 행씩 임시파일에 흘려 쓰기 (공정 수가 많을 때)
+"""
+from copy import copy
+from io import BytesIO
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from openpyxl import Workbook
+from openpyxl.drawing.image import Image as OpenpyxlImage
+from openpyxl.drawing.spreadsheet_drawing import AnchorMarker, OneCellAnchor
+from openpyxl.drawing.xdr import XDRPositiveSize2D
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils.cell import coordinate_to_tuple, range_boundaries
+from openpyxl.utils.units import pixels_to_EMU
+from openpyxl.worksheet.merge import MergedCellRange
+from openpyxl.writer.excel import ExcelWriter
+import xlsxwriter
+from xlsxwriter.utility import xl_cell_to_rowcol
+
+from hazard_analytics import summarize_masks
+from hazard_taxonomy import TAXONOMY, is_checked
+from report_model import Approver, BusinessInfo, Cover, report_from_state
+
+# 시트 종류 (탭별 저장 버튼과 전체 결과서가 공유)
+SHEET_COVER = 'cover'
+SHEET_BUSINESS = 'business'
+SHEET_HAZARD_INFO = 'hazard_info'
+SHEET_CLASSIFICATION = 'classification'
+SHEET_SUMMARY = 'summary'
+REPORT_SHEETS = (SHEET_COVER, SHEET_BUSINESS, SHEET_HAZARD_INFO, SHEET_CLASSIFICATION, SHEET_SUMMARY)
+
+# 엑셀 생성 엔진
+ENGINE_OPENPYXL = 'openpyxl'
+ENGINE_XLSXWRITER = 'xlsxwriter'
+ENGINES = (ENGINE_OPENPYXL, ENGINE_XLSXWRITER)
+
+HEADER_COLOR = 'FEF3C7'
+
+# 서식 정의 - 이름으로 참조하며 셀마다 서식 객체를 새로 만들지 않는다
+STYLE_SPECS = {
+    'cover_year': {'bold': True, 'size': 20, 'align': 'center'},
+    'cover_title': {'bold': True, 'size': 28, 'align': 'center'},
+    'cover_company': {'bold': True, 'size': 16, 'align': 'center'},
+    'cover_approval': {'bold': True, 'fill': HEADER_COLOR, 'align': 'center', 'border': True},
+    'cover_cell': {'align': 'center', 'border': True},
+    'table_header': {'bold': True, 'size': 12, 'fill': HEADER_COLOR, 'align': 'center', 'border': True},
+    'label': {'fill': HEADER_COLOR, 'align': 'center', 'wrap': True, 'border': True},
+    'title': {'bold': True, 'size': 14, 'fill': HEADER_COLOR, 'align': 'center', 'wrap': True, 'border': True},
+    'center': {'align': 'center', 'wrap': True, 'border': True},
+    'left': {'align': 'left', 'wrap': True, 'border': True},
+    'border': {'border': True},
+    'arrow': {'bold': True, 'size': 16, 'align': 'center'},
+}
+
+# 공정 사진 칸 (px) 과 셀 안 여백 - 사진은 비율을 유지해 칸 안에 맞춘다
+PHOTO_BOX = (160, 120)
+PHOTO_PADDING = 4
+# 사진이 들어가는 열 너비(문자 수)와 행 높이(pt)
+PHOTO_COLUMN_WIDTH = 24
+PHOTO_ROW_HEIGHT = (PHOTO_BOX[1] + 2 * PHOTO_PADDING) * 0.75
+
+_thin = Side(style='thin')
+_thin_border = Border(left=_thin, right=_thin, top=_thin, bottom=_thin)
+
+
+def _style_parts(spec):
+    parts = {}
+    if spec.get('bold') or spec.get('size'):
+        parts['font'] = Font(bold=spec.get('bold', False), size=spec.get('size', 11))
+    if spec.get('fill'):
+        parts['fill'] = PatternFill(start_color=spec['fill'], end_color=spec['fill'], fill_type='solid')
+    if spec.get('align'):
+        parts['alignment'] = Alignment(horizontal=spec['align'], vertical='center',
+                                       wrap_text=spec.get('wrap', False))
+    if spec.get('border'):
+        parts['border'] = _thin_border
+    return parts
+
+
+def _fit_photo(photo):
+    """PHOTO_BOX 안에 들어가는 표시 크기 (px, 확대하지 않음)"""
+    scale = min(PHOTO_BOX[0] / photo.width, PHOTO_BOX[1] / photo.height, 1)
+    return max(1, round(photo.width * scale)), max(1, round(photo.height * scale))
+
+
+# 미리 만들어 둔 서식 객체 (불변이므로 모든 워크북이 공유하고, 워크북마다 이름만 등록한다)
+_STYLE_PARTS = {name: _style_parts(spec) for name, spec in STYLE_SPECS.items()}
+
+
+class _SharedImage(OpenpyxlImage):
+    """내용이 같은 사진은 같은 미디어 파일을 가리키는 그림
+
+    openpyxl 은 그림마다 xl/media/imageN 을 따로 저장하므로, 사진 해시별로
+    파일 번호를 하나만 매기고 _SharedMediaWriter 가 파일을 한 번만 쓴다.
+    openpyxl 내부(Image.path, ExcelWriter._write_images)를 바꾸므로 requirements.txt
+    의 버전에 맞춰 두고 test_excel_export.py 로 확인한다.
+    """
+
+    def __init__(self, photo, media_ids):
+        super().__init__(BytesIO(photo.data))
+        self.digest = photo.digest
+        self.media_ids = media_ids  # 워크북 단위 {해시: 파일 번호}
+
+    @property
+    def path(self):
+        media_id = self.media_ids.setdefault(self.digest, len(self.media_ids) + 1)
+        return self._path.format(media_id, self.format)
+
+
+class _SharedMediaWriter(ExcelWriter):
+    def _write_images(self):
+        written = set()
+        for image in self._images:
+            if image.path not in written:
+                written.add(image.path)
+                self._archive.writestr(image.path[1:], image._data())
+
+
+class _OpenpyxlSheet:
+    """시트 작성기 - 시트 빌더는 A1 주소와 서식 이름만 사용한다"""
+
+    def __init__(self, worksheet, style_arrays, media_ids):
+        self.worksheet = worksheet
+        self.style_arrays = style_arrays
+        self.media_ids = media_ids
+
+    def _style_cell(self, row, col, style):
+        cell = self.worksheet.cell(row=row, column=col)
+        if style:
+            # cell.style = name 은 이름 목록을 매번 선형 탐색하므로
+            # 워크북에 등록해 둔 서식 배열을 그대로 복사한다
+            cell._style = copy(self.style_arrays[style])
+        return cell
+
+    def write(self, ref, value=None, style=None):
+        cell = self._style_cell(*coordinate_to_tuple(ref), style)
+        if value is not None:
+            cell.value = value
+
+    def merge(self, cell_range, value=None, style=None):
+        # worksheet.merge_cells() 는 기존 병합 범위 전체와 겹침 검사를 하므로
+        # 병합이 많은 시트에서 O(n^2) 이 된다. 빌더가 만드는 범위는 겹치지 않으므로
+        # 범위를 바로 등록하고, 범위 안 모든 셀에 같은 서식을 준다.
+        self.worksheet.merged_cells.ranges.add(MergedCellRange(self.worksheet, cell_range))
+        min_col, min_row, max_col, max_row = range_boundaries(cell_range)
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                self._style_cell(row, col, style)
+        if value is not None:
+            self.worksheet.cell(row=min_row, column=min_col).value = value
+
+    def insert_image(self, ref, photo):
+        """ref 셀 왼쪽 위에 사진을 넣는다 (photo: photo_pipeline.ProcessPhoto)"""
+        width, height = _fit_photo(photo)
+        image = _SharedImage(photo, self.media_ids)
+        row, col = coordinate_to_tuple(ref)
+        offset = pixels_to_EMU(PHOTO_PADDING)
+        image.anchor = OneCellAnchor(
+            _from=AnchorMarker(col=col - 1, colOff=offset, row=row - 1, rowOff=offset),
+            ext=XDRPositiveSize2D(pixels_to_EMU(width), pixels_to_EMU(height)),
+        )
+        self.worksheet.add_image(image)
+
+    def set_width(self, column, width):
+        self.worksheet.column_dimensions[column].width = width
+
+    def set_height(self, row, height):
+        self.worksheet.row_dimensions[row].height = height
+
+
+class _OpenpyxlBook:
+    def __init__(self):
+        self.workbook = Workbook()
+        self.workbook.remove(self.workbook.active)
+        self.style_arrays = {}
+        for name, parts in _STYLE_PARTS.items():
+            style = NamedStyle(name=name, **parts)
+            self.workbook.add_named_style(style)
+            self.style_arrays[name] = style.as_tuple()
+        self.media_ids = {}
+
+    def add_sheet(self, title):
+        return _OpenpyxlSheet(self.workbook.create_sheet(title), self.style_arrays, self.media_ids)
+
+    def save(self):
+        output = BytesIO()
+        archive = ZipFile(output, 'w', ZIP_DEFLATED, allowZip64=True)
+        _SharedMediaWriter(self.workbook, archive).save()
+        return output.getvalue()
+
+
+def _xlsxwriter_format(spec):
+    fmt = {}
+    if spec.get('bold'):
+        fmt['bold'] = True
+    if spec.get('size'):
+        fmt['font_size'] = spec['size']
+    if spec.get('fill'):
+        fmt['bg_color'] = '#' + spec['fill']
+        fmt['pattern'] = 1
+    if spec.get('align'):
+        fmt['align'] = spec['align']
+        fmt['valign'] = 'vcenter'
+        if spec.get('wrap'):
+            fmt['text_wrap'] = True
+    if spec.get('border'):
+        fmt['border'] = 1
+    return fmt
+
+
+# xlsxwriter 서식 속성 (워크북마다 Format 객체로 한 번씩만 등록)
+_XLSXWRITER_FORMATS = {name: _xlsxwriter_format(spec) for name, spec in STYLE_SPECS.items()}
+
+
+def _range_to_rowcol(cell_range):
+    first, last = cell_range.split(':')
+    return xl_cell_to_rowcol(first) + xl_cell_to_rowcol(last)
+
+
+class _XlsxwriterSheet:
+    """constant_memory 모드 시트 작성기
+
+    이 모드에서는 다음 행으로 넘어가는 순간 이전 행이 파일로 나가고 다시 쓸 수
+    없다. merge_range() 도 범위 전체를 한 번에 채우므로 여러 행에 걸친 병합에는
+    쓸 수 없다. 대신 병합 범위만 먼저 등록하고, 첫 행에 값을 쓴 뒤 나머지 행은
+    그 행에 도달할 때 서식 있는 빈 셀로 채운다.
+    """
+
+    def __init__(self, worksheet, formats):
+        self.worksheet = worksheet
+        self.formats = formats
+        self.row = -1  # 현재 쓰고 있는 행 (0부터)
+        self.pending_merges = []  # (마지막 행, 첫 열, 마지막 열, 서식)
+
+    def _advance(self, row):
+        while self.row < row:
+            self.row += 1
+            for merge in list(self.pending_merges):
+                last_row, first_col, last_col, fmt = merge
+                for col in range(first_col, last_col + 1):
+                    self.worksheet.write_blank(self.row, col, None, fmt)
+                if last_row == self.row:
+                    self.pending_merges.remove(merge)
+
+    def write(self, ref, value=None, style=None):
+        row, col = xl_cell_to_rowcol(ref)
+        self._advance(row)
+        fmt = self.formats[style] if style else None
+        if value is None:
+            self.worksheet.write_blank(row, col, None, fmt)
+        else:
+            self.worksheet.write(row, col, value, fmt)
+
+    def merge(self, cell_range, value=None, style=None):
+        first_row, first_col, last_row, last_col = _range_to_rowcol(cell_range)
+        self._advance(first_row)
+        fmt = self.formats[style] if style else None
+        if first_row == last_row:
+            self.worksheet.merge_range(first_row, first_col, last_row, last_col, value, fmt)
+            return
+        # 여러 행 병합: 범위만 등록 (<mergeCells> 는 시트 데이터와 별도로 저장 시 기록된다)
+        # xlsxwriter 내부 목록이므로 requirements.txt 의 버전에 맞춰 두고 test_excel_export.py 로 확인한다
+        self.worksheet.merge.append([first_row, first_col, last_row, last_col])
+        if value is None:
+            self.worksheet.write_blank(first_row, first_col, None, fmt)
+        else:
+            self.worksheet.write(first_row, first_col, value, fmt)
+        for col in range(first_col + 1, last_col + 1):
+            self.worksheet.write_blank(first_row, col, None, fmt)
+        self.pending_merges.append((last_row, first_col, last_col, fmt))
+
+    def insert_image(self, ref, photo):
+        # 그림은 시트 데이터와 따로 저장되므로 constant_memory 모드에서도 언제든 넣을 수 있고,
+        # 내용이 같은 그림은 xlsxwriter 가 파일 안에 한 번만 저장한다
+        width, _ = _fit_photo(photo)
+        scale = width / photo.width
+        self.worksheet.insert_image(ref, f"{photo.digest[:16]}.jpg", {
+            'image_data': BytesIO(photo.data),
+            'x_scale': scale,
+            'y_scale': scale,
+            'x_offset': PHOTO_PADDING,
+            'y_offset': PHOTO_PADDING,
+            'object_position': 1,
+        })
+
+    def set_width(self, column, width):
+        self.worksheet.set_column(f'{column}:{column}', width)
+
+    def set_height(self, row, height):
+        # 해당 행을 쓰기 전에 호출해야 한다
+        self.worksheet.set_row(row - 1, height)
+
+    def close(self):
+        if self.pending_merges:
+            self._advance(max(merge[0] for merge in self.pending_merges))
+
+
+class _XlsxwriterBook:
+    def __init__(self):
+        self.output = BytesIO()
+        self.workbook = xlsxwriter.Workbook(self.output, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd',
+            # 기본값이면 http:// 로 시작하는 입력이 링크가 되고 2079자를 넘으면 셀이 비므로
+            # openpyxl 엔진처럼 문자열 그대로 쓴다
+            'strings_to_urls': False,
+        })
+        self.formats = {name: self.workbook.add_format(fmt)
+                        for name, fmt in _XLSXWRITER_FORMATS.items()}
+        self.sheets = []
+
+    def add_sheet(self, title):
+        sheet = _XlsxwriterSheet(self.workbook.add_worksheet(title), self.formats)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self):
+        for sheet in self.sheets:
+            sheet.close()
+        self.workbook.close()
+        return self.output.getvalue()
+
+
+_BOOKS = {
+    ENGINE_OPENPYXL: _OpenpyxlBook,
+    ENGINE_XLSXWRITER: _XlsxwriterBook,
+}
+
+
+# ---------------------------------------------------------------------------
+# 시트 빌더
+# ---------------------------------------------------------------------------
+
+def write_cover_sheet(sheet, cover):
+    """표지 시트 (cover: report_model.Cover)"""
+    # 열 너비 조정
+    for column, width in zip('ABCDEFG', (5, 15, 15, 15, 15, 15, 5)):
+        sheet.set_width(column, width)
+    sheet.set_height(11, 40)
+
+    # 연도 / 제목 (병합 셀)
+    sheet.merge('C2:E3', f"20{cover.year}년도", 'cover_year')
+    sheet.merge('B5:F7', "위험성평가 결과서", 'cover_title')
+
+    # 결재란
+    sheet.merge('B10:B12', "결재", 'cover_approval')
+    columns = ['C', 'D', 'E', 'F']
+    approvers = list(cover.approvers[:len(columns)])
+    approvers += [Approver()] * (len(columns) - len(approvers))
+    for approver, col in zip(approvers, columns):
+        sheet.write(f'{col}10', approver.position, 'cover_cell')
+    for col in columns:
+        # 서명 공간
+        sheet.write(f'{col}11', None, 'cover_cell')
+    for approver, col in zip(approvers, columns):
+        sheet.write(f'{col}12', approver.name, 'cover_cell')
+
+    # 회사 정보 (하단)
+    info_start_row = 15
+    sheet.write(f'C{info_start_row}', cover.company_name, 'cover_company')
+    sheet.write(f'C{info_start_row+2}', f"주소: {cover.address}")
+    sheet.write(f'C{info_start_row+3}', f"전화: {cover.phone}")
+    sheet.write(f'C{info_start_row+4}', f"팩스: {cover.fax}")
+
+
+def _column_letter(idx):
+    # 0 -> A (위험정보/공정정보 시트는 26열을 넘지 않는다)
+    return chr(ord('A') + idx)
+
+
+def write_table_sheet(sheet, headers, rows, photos=None, photo_header="사진"):
+    """헤더 한 줄 + 데이터 행으로 된 표 시트 (열 너비는 내용에 맞춤)
+
+    photos 를 주면 (행마다 ProcessPhoto 또는 None) 마지막에 사진 열을 붙인다.
+    """
+    rows = [list(row) for row in rows]
+    for col_idx, header in enumerate(headers):
+        max_length = max(len(str(value)) for value in [header] + [row[col_idx] for row in rows]
+                         if value is not None)
+        sheet.set_width(_column_letter(col_idx), (max_length + 2) * 1.2)
+    photo_column = _column_letter(len(headers))
+    if photos:
+        sheet.set_width(photo_column, PHOTO_COLUMN_WIDTH)
+
+    for col_idx, header in enumerate(headers):
+        sheet.write(f'{_column_letter(col_idx)}1', header, 'table_header')
+    if photos:
+        sheet.write(f'{photo_column}1', photo_header, 'table_header')
+    for row_idx, row in enumerate(rows, start=2):
+        photo = photos[row_idx - 2] if photos else None
+        if photo:
+            sheet.set_height(row_idx, PHOTO_ROW_HEIGHT)
+        for col_idx, value in enumerate(row):
+            if value is not None and value != '':
+                sheet.write(f'{_column_letter(col_idx)}{row_idx}', value)
+        if photo:
+            sheet.insert_image(f'{photo_column}{row_idx}', photo)
+
+
+# 공정정보 시트 열 (헤더, 공정 필드)
+PROCESS_COLUMNS = [
+    ('공정명', 'name'),
+    ('공정설명', 'description'),
+    ('주요기계기구', 'equipment'),
+    ('유해위험물질', 'hazardous_material'),
+    ('유해위험요인', 'hazardous_factor'),
+]
+
+
+def _process_photo(process, photos):
+    return photos.get(process.photo) if photos is not None and process.photo else None
+
+
+# 공정도 시트 한 줄에 놓는 공정 수 (화면의 공정도와 같다)
+FLOW_PER_ROW = 5
+
+
+def write_flow_sheet(sheet, processes, photos=None):
+    """공정도 시트 - 공정 순서대로 공정명/사진/주요기계기구 칸을 놓고 사이에 화살표
+
+    processes 는 report_model.Process 목록 (공정명이 있는 공정).
+
+    공정은 B, D, F, ... 열에, 화살표는 그 앞 A, C, E, ... 열에 둔다.
+    """
+    for slot in range(FLOW_PER_ROW):
+        sheet.set_width(_column_letter(slot * 2), 4)
+        sheet.set_width(_column_letter(slot * 2 + 1), PHOTO_COLUMN_WIDTH)
+
+    row = 1
+    for start in range(0, len(processes), FLOW_PER_ROW):
+        group = processes[start:start + FLOW_PER_ROW]
+        for slot, process in enumerate(group):
+            sheet.write(f'{_column_letter(slot * 2 + 1)}{row}', process.name, 'title')
+
+        sheet.set_height(row + 1, PHOTO_ROW_HEIGHT)
+        for slot, process in enumerate(group):
+            if start + slot > 0:
+                sheet.write(f'{_column_letter(slot * 2)}{row + 1}', "→", 'arrow')
+            ref = f'{_column_letter(slot * 2 + 1)}{row + 1}'
+            sheet.write(ref, None, 'border')
+            photo = _process_photo(process, photos)
+            if photo:
+                sheet.insert_image(ref, photo)
+
+        for slot, process in enumerate(group):
+            sheet.write(f'{_column_letter(slot * 2 + 1)}{row + 2}', process.equipment, 'left')
+        # 한 줄 띄우고 다음 줄
+        row += 4
+
+
+def write_business_sheets(book, business_info, processes, photos=None):
+    """사업장정보 + 공정정보 + 공정도 시트 (공정이 없으면 공정정보/공정도 생략)
+
+    business_info 는 report_model.BusinessInfo, processes 는 Process 목록.
+    photos 는 공정 'photo' 칸의 해시로 사진을 찾는 photo_pipeline.PhotoStore.
+    """
+    write_table_sheet(book.add_sheet('사업장정보'), list(BusinessInfo._fields), [list(business_info)])
+
+    if not processes:
+        return
+    process_rows = [[getattr(process, field) for _, field in PROCESS_COLUMNS] for process in processes]
+    process_photos = [_process_photo(process, photos) for process in processes]
+    write_table_sheet(book.add_sheet('공정정보'), [header for header, _ in PROCESS_COLUMNS],
+                      process_rows, process_photos if any(process_photos) else None, "공정사진")
+    write_flow_sheet(book.add_sheet('공정도'), processes, photos)
+
+
+# 위험정보 시트 데이터 열: (열, 공정 필드, 서식) - report_model.HazardInfoRow 필드 순서와 같다
+HAZARD_INFO_COLUMNS = [
+    ('A', 'name', 'center'),
+    ('B', 'equipment', 'left'),
+    ('C', 'qty', 'center'),
+    ('D', 'hazardous_material', 'left'),
+    ('E', 'amount', 'center'),
+    ('F', 'time', 'center'),
+    ('G', 'accident', 'center'),
+    ('H', 'near_miss', 'center'),
+    ('I', 'workers', 'center'),
+    ('J', 'contract', 'center'),
+    ('K', 'transport', 'center'),
+    ('L', 'permit', 'center'),
+    ('M', 'measurement', 'center'),
+    ('N', 'special_edu', 'center'),
+]
+
+HAZARD_INFO_HEADERS = ['기계기구 및\n설비명', '수량', '화학물질명', '취급량/일', '취급시간',
+                       '3년간\n재해사례', '앗차\n사고사례', '근로자\n구성및특성', '도급/교대\n작업유무',
+                       '운반수단', '안전작업\n허가증\n필요작업', '작업환경\n측정유무', '특별안전\n교육대상']
+
+HAZARD_INFO_WIDTHS = (12, 20, 8, 20, 10, 10, 10, 10, 12, 10, 10, 12, 12, 12)
+
+
+def write_hazard_info_sheet(sheet, hazard_info, rows):
+    """위험정보 시트 (report_model.HazardInfo 상단 정보 + HazardInfoRow 목록)"""
+    for column, width in zip('ABCDEFGHIJKLMN', HAZARD_INFO_WIDTHS):
+        sheet.set_width(column, width)
+
+    # 상단 정보 테이블
+    top_rows = [
+        (1, ('업종명', 'industry_name'), ('생산품', 'product_name')),
+        (2, ('원(재)료', 'raw_material'), ('근로자', 'workers_info')),
+    ]
+    for row, (left_label, left_key), (right_label, right_key) in top_rows:
+        sheet.write(f'A{row}', left_label, 'label')
+        sheet.merge(f'B{row}:C{row}', getattr(hazard_info, left_key), 'center')
+        sheet.write(f'D{row}', right_label, 'label')
+        sheet.merge(f'E{row}:F{row}', getattr(hazard_info, right_key), 'center')
+
+    # 공정(작업)순서 테이블 헤더
+    current_row = 4
+    sheet.merge(f'A{current_row}:A{current_row+1}', "공정\n(작업)순서", 'label')
+    sheet.merge(f'B{current_row}:C{current_row}', "기계기구 및 설비명", 'label')
+    sheet.merge(f'D{current_row}:F{current_row}', "유해화학물질", 'label')
+    sheet.merge(f'G{current_row}:N{current_row}', "기타 안전보건상 정보", 'label')
+
+    current_row += 1
+    for col_idx, header in enumerate(HAZARD_INFO_HEADERS, start=1):
+        sheet.write(f'{_column_letter(col_idx)}{current_row}', header, 'label')
+
+    # 데이터 입력
+    current_row += 1
+    for row in rows:
+        for (column, _, style), value in zip(HAZARD_INFO_COLUMNS, row):
+            sheet.write(f'{column}{current_row}', value, style)
+        current_row += 1
+
+
+def write_classification_sheet(sheet, processes, hazard_classifications, taxonomy=TAXONOMY):
+    """유해위험요인분류 시트 (공정마다 분류표 하나)
+
+    processes 는 report_model.Process 목록, hazard_classifications 는
+    공정 id -> HazardClassification.
+    """
+    for column, width in zip('ABCDEF', (8, 20, 25, 25, 25, 15)):
+        sheet.set_width(column, width)
+
+    col_letters = ['C', 'D', 'E']
+    current_row = 1
+    for process in processes:
+        # 분류는 공정 id 로 저장한다
+        classification = hazard_classifications.get(process.id)
+
+        # 테이블 헤더
+        sheet.merge(f'A{current_row}:B{current_row}', "제조 공정", 'label')
+        sheet.merge(f'C{current_row}:D{current_row}', "유해위험요인 분류", 'title')
+        sheet.write(f'E{current_row}', "세부 공정", 'label')
+        sheet.write(f'F{current_row}', "분류 코드", 'label')
+        current_row += 1
+
+        # 입력 데이터
+        sheet.merge(f'A{current_row}:B{current_row}',
+                    classification.manufacturing_process if classification else '', 'center')
+        sheet.merge(f'C{current_row}:D{current_row}', None, 'border')
+        sheet.write(f'E{current_row}', process.name, 'center')
+        sheet.write(f'F{current_row}', classification.classification_code if classification else '', 'center')
+        current_row += 2
+
+        # 유해위험요인 분류 테이블 헤더
+        sheet.write(f'A{current_row}', "분류", 'label')
+        sheet.write(f'B{current_row}', "분야", 'label')
+        sheet.merge(f'C{current_row}:E{current_row}', "유해위험요인", 'label')
+        current_row += 1
+
+        checked_mask = classification.checked if classification else 0
+        for category in taxonomy.categories:
+            last_row = current_row + len(category.rows) - 1
+            # 분류 번호 / 분야 (카테고리별로 병합)
+            if last_row > current_row:
+                sheet.merge(f'A{current_row}:A{last_row}', category.index + 1, 'center')
+                sheet.merge(f'B{current_row}:B{last_row}', category.name, 'center')
+            else:
+                sheet.write(f'A{current_row}', category.index + 1, 'center')
+                sheet.write(f'B{current_row}', category.name, 'center')
+
+            for row in category.rows:
+                for item, col in zip(row, col_letters):
+                    ref = f'{col}{current_row}'
+                    if item is None:
+                        sheet.write(ref, None, 'border')
+                        continue
+                    cell_value = item.label
+                    if classification is not None:
+                        mark = '☑' if is_checked(checked_mask, item.position) else '☐'
+                        cell_value = f"{mark} {item.label}"
+                    sheet.write(ref, cell_value, 'left')
+                current_row += 1
+
+        current_row += 2  # 공정 간 간격
+
+
+def write_summary_sheet(sheet, processes, hazard_classifications, taxonomy=TAXONOMY):
+    """유해위험요인 요약 시트 (항목별 / 분류별 해당 공정 수, 같은 구성의 공정 묶음)"""
+    for column, width in zip('ABCD', (8, 20, 40, 40)):
+        sheet.set_width(column, width)
+
+    summary = summarize_masks(
+        [process.name for process in processes],
+        [hazard_classifications[process.id].checked if process.id in hazard_classifications else 0
+         for process in processes],
+        taxonomy,
+    )
+
+    sheet.merge('A1:D1', "유해위험요인 요약", 'title')
+    sheet.merge('A2:C2', "평가 공정 수", 'label')
+    sheet.write('D2', len(summary.process_names), 'center')
+
+    # 항목별 해당 공정 수
+    current_row = 4
+    for col, header in zip('ABCD', ("분류", "분야", "유해위험요인", "해당 공정 수")):
+        sheet.write(f'{col}{current_row}', header, 'label')
+    current_row += 1
+    for item in taxonomy.items:
+        category = taxonomy.categories[item.category_idx]
+        sheet.write(f'A{current_row}', category.index + 1, 'center')
+        sheet.write(f'B{current_row}', category.name, 'center')
+        sheet.write(f'C{current_row}', item.label, 'left')
+        sheet.write(f'D{current_row}', int(summary.item_counts[item.position]), 'center')
+        current_row += 1
+
+    # 분류별 합계
+    current_row += 1
+    for col, header in zip('ABCD', ("분류", "분야", "체크된 항목 수", "해당 공정 수")):
+        sheet.write(f'{col}{current_row}', header, 'label')
+    current_row += 1
+    for category in taxonomy.categories:
+        sheet.write(f'A{current_row}', category.index + 1, 'center')
+        sheet.write(f'B{current_row}', category.name, 'center')
+        sheet.write(f'C{current_row}', int(summary.category_checks[category.index]), 'center')
+        sheet.write(f'D{current_row}', int(summary.category_processes[category.index]), 'center')
+        current_row += 1
+
+    # 유해위험요인 구성이 같은 공정
+    if summary.shared_profiles:
+        current_row += 1
+        sheet.merge(f'A{current_row}:B{current_row}', "공정 수", 'label')
+        sheet.write(f'C{current_row}', "공정", 'label')
+        sheet.write(f'D{current_row}', "유해위험요인", 'label')
+        current_row += 1
+        for members, positions in summary.shared_profiles:
+            sheet.merge(f'A{current_row}:B{current_row}', len(members), 'center')
+            sheet.write(f'C{current_row}', ', '.join(members), 'left')
+            sheet.write(f'D{current_row}', ', '.join(taxonomy.position_to_code[p] for p in positions), 'left')
+            current_row += 1
+
+
+# ---------------------------------------------------------------------------
+# 워크북 생성
+# ---------------------------------------------------------------------------
+
+def render_workbook(report, sheets=REPORT_SHEETS, engine=ENGINE_OPENPYXL):
+    """report_model.Report 로 워크북을 만들어 xlsx 바이트로 반환
+
+    sheets 에 든 순서대로 시트를 만든다. 탭별 저장 버튼은 시트 하나만,
+    전체 결과서는 REPORT_SHEETS 전체를 넘긴다. engine 은 ENGINES 중 하나.
+    """
+    if engine not in _BOOKS:
+        raise ValueError(f"알 수 없는 엑셀 엔진: {engine}")
+    book = _BOOKS[engine]()
+
+    for kind in sheets:
+        if kind == SHEET_COVER:
+            write_cover_sheet(book.add_sheet('표지'), report.cover or Cover())
+        elif kind == SHEET_BUSINESS:
+            write_business_sheets(book, report.business_info, report.processes, report.photos)
+        elif kind == SHEET_HAZARD_INFO:
+            write_hazard_info_sheet(book.add_sheet('위험정보'), report.hazard_info, report.hazard_info_rows)
+        elif kind == SHEET_CLASSIFICATION:
+            write_classification_sheet(book.add_sheet('유해위험요인분류'), report.processes,
+                                       report.hazard_classifications)
+        elif kind == SHEET_SUMMARY:
+            write_summary_sheet(book.add_sheet('요약'), report.processes, report.hazard_classifications)
+        else:
+            raise ValueError(f"알 수 없는 시트 종류: {kind}")
+
+    return book.save()
+
+
+def build_workbook(state, sheets=REPORT_SHEETS, engine=ENGINE_OPENPYXL):
+    """세션 상태(또는 같은 키를 가진 dict)로 워크북을 만들어 xlsx 바이트로 반환"""
+    return render_workbook(report_from_state(state), sheets, engine)
@@ -0,0 +1,251 @@
+"""위험성평가 결과서 엑셀 불러오기
+
+excel_export 가 만드는 것과 같은 모양의 결과서(표지 / 사업장정보 / 공정정보 /
+위험정보 / 유해위험요인분류 시트)를 읽어 세션 상태로 되돌린다. 예전에 만든
+결과서를 다시 고칠 수 있도록 하기 위한 것이다.
+
+openpyxl read_only 모드로 시트를 한 행씩 흘려 읽으므로 큰 파일도 빨리, 적은
+메모리로 읽는다. 유해위험요인분류 시트의 '☑ 1.1 끼임(...)' 칸은 앞의 항목
+코드로 체크 상태를 되살린다. 요약 / 공정도 시트는 다른 시트에서 다시 만들 수
+있으므로 읽지 않고, read_only 모드에서는 그림을 읽을 수 없으므로 공정 사진은
+가져오지 않는다.
+"""
+import re
+import uuid
+from datetime import date, datetime
+from io import BytesIO
+from zipfile import BadZipFile
+
+from openpyxl import load_workbook
+
+from excel_export import HAZARD_INFO_COLUMNS, PROCESS_COLUMNS
+from hazard_taxonomy import TAXONOMY
+from photo_pipeline import PhotoStore
+from process_table import DEFAULTS, FIELDS
+from project_store import PROJECT_FORMAT, PROJECT_VERSION, restore_state
+
+XLSX_EXTENSION = 'xlsx'
+
+CHECKED_MARK = '☑'
+UNCHECKED_MARK = '☐'
+
+# 표지 연도 칸 ('2024년도' -> '24')
+_YEAR_PATTERN = re.compile(r'\s*20(\d*)\s*년도')
+
+
+def _text(value):
+    """셀 값 -> 입력칸 문자열 (엑셀이 숫자로 바꿔 둔 값도 원래 모양으로)"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _strip_prefix(value, prefix):
+    value = _text(value)
+    return value[len(prefix):].strip() if value.startswith(prefix) else value.strip()
+
+
+def read_cover_sheet(sheet):
+    """표지 시트 -> form_data"""
+    cells = {}
+    for row_idx, row in enumerate(sheet.iter_rows(max_row=19, max_col=6, values_only=True), start=1):
+        for col_idx, value in enumerate(row):
+            if value is not None:
+                cells[f'{chr(ord("A") + col_idx)}{row_idx}'] = value
+
+    year = _YEAR_PATTERN.match(_text(cells.get('C2')))
+    return {
+        'year': year.group(1) if year else '',
+        'company_name': _text(cells.get('C15')),
+        'address': _strip_prefix(cells.get('C17'), '주소:'),
+        'phone': _strip_prefix(cells.get('C18'), '전화:'),
+        'fax': _strip_prefix(cells.get('C19'), '팩스:'),
+        'approvers': [{'position': _text(cells.get(f'{col}10')), 'name': _text(cells.get(f'{col}12'))}
+                      for col in 'CDEF'],
+    }
+
+
+def read_business_sheet(sheet):
+    """사업장정보 시트 (헤더 = business_info 키) -> business_info"""
+    rows = sheet.iter_rows(max_row=2, values_only=True)
+    headers = next(rows, ())
+    values = next(rows, ())
+    business_info = {header: _text(value) for header, value in zip(headers, values) if header}
+    # 평가일은 날짜로 읽히는 값만 (직접 적은 글자는 비운다)
+    if business_info.get('evaluation_date'):
+        try:
+            date.fromisoformat(business_info['evaluation_date'])
+        except ValueError:
+            business_info['evaluation_date'] = ''
+    return business_info
+
+
+def read_process_sheet(sheet):
+    """공정정보 시트 -> 공정 dict 목록 (공정 카드 필드)"""
+    rows = sheet.iter_rows(values_only=True)
+    header_fields = dict(PROCESS_COLUMNS)
+    # 모르는 열(공정사진 등)은 None
+    fields = [header_fields.get(header) for header in next(rows, ())]
+    processes = []
+    for row in rows:
+        process = {field: _text(value) for field, value in zip(fields, row) if field}
+        if process.get('name'):
+            processes.append(process)
+    return processes
+
+
+def read_hazard_info_sheet(sheet):
+    """위험정보 시트 -> (상단 정보 {키: 값}, 공정 dict 목록)"""
+    top = {}
+    processes = []
+    for row_idx, row in enumerate(sheet.iter_rows(max_col=len(HAZARD_INFO_COLUMNS), values_only=True),
+                                  start=1):
+        if row_idx <= 2:
+            # A 라벨 / B:C 값 / D 라벨 / E:F 값
+            left_key, right_key = (('industry_name', 'product_name') if row_idx == 1
+                                   else ('raw_material', 'workers_info'))
+            top[left_key] = _text(row[1] if len(row) > 1 else None)
+            top[right_key] = _text(row[4] if len(row) > 4 else None)
+        elif row_idx >= 6:
+            process = {field: _text(value) for (_, field, _), value in zip(HAZARD_INFO_COLUMNS, row)}
+            if process.get('name'):
+                processes.append(process)
+    return top, processes
+
+
+def _parse_mark(value, taxonomy):
+    """'☑ 1.1 끼임(...)' -> ('1.1', True), 체크 칸이 아니면 None"""
+    text = _text(value).strip()
+    if not text or text[0] not in (CHECKED_MARK, UNCHECKED_MARK):
+        return None
+    parts = text[1:].split(maxsplit=1)
+    if not parts or parts[0] not in taxonomy.code_to_position:
+        return None
+    return parts[0], text[0] == CHECKED_MARK
+
+
+def read_classification_sheet(sheet, taxonomy=TAXONOMY):
+    """유해위험요인분류 시트 -> (공정명, 분류 dict) 목록
+
+    공정마다 '제조 공정' 헤더 행, 입력 행(제조 공정 / 세부 공정 / 분류 코드),
+    항목 행(C~E 칸) 순서로 되어 있다. 체크 표시가 하나도 없는 공정(분류를
+    입력하지 않은 공정)은 분류 없이 돌려준다.
+    """
+    blocks = []
+    block = None
+    expect_input = False
+    for row in sheet.iter_rows(max_col=6, values_only=True):
+        row = tuple(row) + (None,) * (6 - len(row))
+        if row[0] == "제조 공정":
+            block = None
+            expect_input = True
+            continue
+        if expect_input:
+            expect_input = False
+            block = {
+                'name': _text(row[4]),
+                'manufacturing_process': _text(row[0]),
+                'classification_code': _text(row[5]),
+                'checked': [],
+                'marked': False,
+            }
+            blocks.append(block)
+            continue
+        if block is None:
+            continue
+        for value in row[2:5]:
+            mark = _parse_mark(value, taxonomy)
+            if mark:
+                block['marked'] = True
+                if mark[1]:
+                    block['checked'].append(mark[0])
+
+    result = []
+    for block in blocks:
+        classification = None
+        if block.pop('marked'):
+            classification = {key: block[key] for key in ('manufacturing_process', 'classification_code',
+                                                           'checked')}
+        result.append((block['name'], classification))
+    return result
+
+
+def _merge_processes(*sources):
+    """공정 dict 목록 여러 개를 공정명(같은 이름은 나온 순서)으로 맞춰 합친다
+
+    공정 순서는 처음으로 비어 있지 않은 목록을 따르고, 그 목록에 없는 공정은
+    뒤에 붙인다.
+    """
+    merged = []
+    by_key = {}
+    for source in sources:
+        seen = {}
+        for process in source:
+            name = process['name']
+            key = (name, seen.get(name, 0))
+            seen[name] = key[1] + 1
+            if key in by_key:
+                by_key[key].update((field, value) for field, value in process.items() if value)
+            else:
+                by_key[key] = dict(process)
+                merged.append(by_key[key])
+    return merged
+
+
+def import_workbook(data, taxonomy=TAXONOMY):
+    """결과서 xlsx 바이트 -> 세션 상태에 넣을 {키: 값} ('photos' 포함)"""
+    try:
+        workbook = load_workbook(BytesIO(data), read_only=True, data_only=True)
+    except (BadZipFile, KeyError, OSError, ValueError) as exc:
+        raise ValueError("엑셀 파일을 읽을 수 없습니다") from exc
+
+    try:
+        sheets = {}
+        for name in ('표지', '사업장정보', '공정정보', '위험정보', '유해위험요인분류'):
+            if name in workbook.sheetnames:
+                sheet = workbook[name]
+                # 다른 프로그램이 저장한 파일은 시트 크기 정보가 틀릴 수 있다
+                sheet.reset_dimensions()
+                sheets[name] = sheet
+        if not sheets:
+            raise ValueError("위험성평가 결과서 시트(표지/공정정보/위험정보/유해위험요인분류)가 없습니다")
+
+        form_data = read_cover_sheet(sheets['표지']) if '표지' in sheets else None
+        business_info = read_business_sheet(sheets['사업장정보']) if '사업장정보' in sheets else {}
+        card_processes = read_process_sheet(sheets['공정정보']) if '공정정보' in sheets else []
+        hazard_info, info_processes = (read_hazard_info_sheet(sheets['위험정보']) if '위험정보' in sheets
+                                       else ({}, []))
+        classified = (read_classification_sheet(sheets['유해위험요인분류'], taxonomy)
+                      if '유해위험요인분류' in sheets else [])
+    finally:
+        workbook.close()
+
+    processes = _merge_processes(card_processes, info_processes,
+                                 [{'name': name, 'classification': classification}
+                                  for name, classification in classified])
+    columns = {field: [] for field in FIELDS}
+    classifications = {}
+    for process in processes:
+        process_id = uuid.uuid4().hex
+        for field, column in columns.items():
+            column.append(process_id if field == 'id' else process.get(field, DEFAULTS.get(field, '')))
+        if process.get('classification'):
+            classifications[process_id] = process['classification']
+
+    state = restore_state({
+        'format': PROJECT_FORMAT,
+        'version': PROJECT_VERSION,
+        'form_data': form_data,
+        'business_info': business_info,
+        'hazard_info': hazard_info,
+        'processes': columns,
+        'hazard_classifications': classifications,
+    }, taxonomy)
+    state['photos'] = PhotoStore()
+    return state
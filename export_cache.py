@@ -0,0 +1,114 @@
+"""엑셀 내보내기 캐시
+
+시트마다 필요한 세션 상태 조각만 해시해서 키로 쓰고, 키가 같으면 이미 만든
+xlsx 바이트를 그대로 돌려준다. 세션별 총 바이트 수 한도를 넘으면 가장 오래
+쓰지 않은 항목부터 버린다.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+
+from excel_export import (
+    HAZARD_INFO_COLUMNS, PROCESS_COLUMNS, SHEET_BUSINESS, SHEET_CLASSIFICATION, SHEET_COVER,
+    SHEET_HAZARD_INFO, SHEET_SUMMARY,
+)
+
+# 위험정보 탭 상단 입력 키
+HAZARD_INFO_TOP_KEYS = ('industry_name', 'product_name', 'raw_material', 'workers_info')
+
+# 시트별로 읽는 공정 필드
+BUSINESS_PROCESS_FIELDS = tuple(field for _, field in PROCESS_COLUMNS) + ('photo',)
+HAZARD_INFO_PROCESS_FIELDS = tuple(field for _, field, _ in HAZARD_INFO_COLUMNS)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha256(value).hexdigest()
+    # 업로드 파일 등은 파일 id 로 구분
+    file_id = getattr(value, 'file_id', None)
+    if file_id is not None:
+        return f"file:{file_id}"
+    return repr(value)
+
+
+def _process_slice(processes, fields):
+    """공정 표에서 fields 열만 (열 list 를 복사하지 않고 그대로 담는다)"""
+    return {field: processes.column(field) for field in fields}
+
+
+def _sheet_slices(state, kind):
+    if kind == SHEET_COVER:
+        return {'form_data': state.get('form_data')}
+    if kind == SHEET_BUSINESS:
+        return {'business_info': state.get('business_info'),
+                'processes': _process_slice(state['processes'], BUSINESS_PROCESS_FIELDS)}
+    if kind == SHEET_HAZARD_INFO:
+        return {
+            'processes': _process_slice(state['processes'], HAZARD_INFO_PROCESS_FIELDS),
+            'top': {key: state.get(key, '') for key in HAZARD_INFO_TOP_KEYS},
+        }
+    if kind in (SHEET_CLASSIFICATION, SHEET_SUMMARY):
+        return {'processes': _process_slice(state['processes'], ('id', 'name')),
+                'hazard_classifications': state.get('hazard_classifications', {})}
+    raise ValueError(f"알 수 없는 시트 종류: {kind}")
+
+
+def export_key(state, sheets, engine):
+    """시트 목록 + 엔진 + 관련 세션 상태 조각의 해시"""
+    payload = {
+        'sheets': list(sheets),
+        'engine': engine,
+        'state': [_sheet_slices(state, kind) for kind in sheets],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ExportCache:
+    """총 바이트 수로 크기를 제한하는 LRU 캐시"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is not None:
+            self.entries.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        if key in self.entries:
+            self.total_bytes -= len(self.entries.pop(key))
+        if len(data) > self.max_bytes:
+            # 한도보다 큰 파일은 캐시하지 않는다
+            return
+        self.entries[key] = data
+        self.total_bytes += len(data)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    def get_or_build(self, key, build):
+        data = self.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        data = build()
+        self.put(key, data)
+        return data
@@ -0,0 +1,80 @@
+"""유해위험요인 집계
+
+공정별 체크 비트마스크를 공정 × 유해위험요인 bool 행렬로 펼친 뒤
+항목별 해당 공정 수, 분류별 합계, 같은 유해위험요인 구성을 가진 공정
+묶음을 NumPy 연산으로 한 번에 계산한다.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from hazard_taxonomy import TAXONOMY
+
+
+class HazardSummary(NamedTuple):
+    process_names: list      # 행 순서의 공정명
+    matrix: np.ndarray       # (공정 수, 항목 수) bool
+    item_counts: np.ndarray  # 항목별 해당 공정 수
+    category_checks: np.ndarray     # 분류별 체크된 (공정, 항목) 수
+    category_processes: np.ndarray  # 분류별 항목이 하나라도 체크된 공정 수
+    shared_profiles: list    # [(공정명 목록, 항목 순번 목록)] - 구성이 같은 공정 2개 이상, 체크 많은 순
+
+
+def masks_to_matrix(masks, item_count):
+    """비트마스크 목록 -> (len(masks), item_count) bool 행렬
+
+    item_count 를 넘는 비트(항목이 더 많던 이전 분류 기준으로 저장된 값)는 버린다.
+    """
+    nbytes = max((item_count + 7) // 8, 1)
+    width = (1 << item_count) - 1
+    buffer = b''.join((mask & width).to_bytes(nbytes, 'little') for mask in masks)
+    packed = np.frombuffer(buffer, dtype=np.uint8).reshape(len(masks), nbytes)
+    bits = np.unpackbits(packed, axis=1, bitorder='little')[:, :item_count]
+    return bits.astype(bool)
+
+
+def process_masks(processes, hazard_classifications):
+    """공정명이 있는 공정의 (공정명, 체크 마스크) 목록"""
+    return [
+        (process['name'], hazard_classifications.get(process['id'], {}).get('checked', 0))
+        for process in processes if process['name']
+    ]
+
+
+def summarize(processes, hazard_classifications, taxonomy=TAXONOMY):
+    entries = process_masks(processes, hazard_classifications)
+    return summarize_masks([name for name, _ in entries], [mask for _, mask in entries], taxonomy)
+
+
+def summarize_masks(names, masks, taxonomy=TAXONOMY):
+    """공정명 목록과 같은 순서의 체크 마스크 목록으로 집계"""
+    matrix = masks_to_matrix(masks, len(taxonomy))
+
+    item_counts = matrix.sum(axis=0)
+
+    # 분류별 합계 - 항목은 분류 순서로 연속 배치되어 있다 (항목이 없는 분류는 0)
+    filled = [category for category in taxonomy.categories if category.items]
+    per_process = np.zeros((len(names), len(taxonomy.categories)), dtype=np.int64)
+    if len(names) and filled:
+        offsets = np.array([category.items[0].position for category in filled])
+        columns = [category.index for category in filled]
+        per_process[:, columns] = np.add.reduceat(matrix, offsets, axis=1, dtype=np.int64)
+    category_checks = per_process.sum(axis=0)
+    category_processes = (per_process > 0).sum(axis=0)
+
+    # 같은 구성의 공정 묶음 (체크가 하나도 없는 공정은 제외)
+    shared_profiles = []
+    if len(names):
+        packed = np.packbits(matrix, axis=1)
+        profiles, inverse, counts = np.unique(packed, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+        for profile_idx in np.flatnonzero(counts > 1):
+            positions = np.flatnonzero(np.unpackbits(profiles[profile_idx])[:len(taxonomy)])
+            if not len(positions):
+                continue
+            members = [names[i] for i in np.flatnonzero(inverse == profile_idx)]
+            shared_profiles.append((members, positions.tolist()))
+        shared_profiles.sort(key=lambda group: (-len(group[1]), -len(group[0])))
+
+    return HazardSummary(names, matrix, item_counts, category_checks, category_processes,
+                         shared_profiles)
@@ -0,0 +1,39 @@
+"""위험정보 탭 표 편집
+
+공정 표(ProcessTable)의 위험정보 열로 DataFrame 을 만들어 st.data_editor 에
+넘기고, 편집된 DataFrame 을 다시 공정 표 열에 써 넣는다.
+"""
+from excel_export import HAZARD_INFO_COLUMNS, HAZARD_INFO_HEADERS
+from process_table import HAZARD_INFO_FIELDS, YES_NO_FIELDS, YES_NO_OPTIONS
+
+# 표에 보이기만 하는 열 (사업장 개요 탭에서 입력)
+READONLY_FIELDS = ('name', 'equipment', 'hazardous_material')
+
+# 시트 열 순서의 필드
+GRID_FIELDS = tuple(field for _, field, _ in HAZARD_INFO_COLUMNS)
+
+# 필드 -> 표 머리글
+FIELD_LABELS = {'name': "공정(작업)순서"}
+for field, header in zip(GRID_FIELDS[1:], HAZARD_INFO_HEADERS):
+    FIELD_LABELS[field] = header.replace('\n', ' ')
+
+
+def yes_no_options(values):
+    """유/무 선택지 - 선택지에 없는 값이 남아 있으면 빈 칸 대신 그 값이 보이도록 덧붙인다"""
+    extra = sorted({value for value in values if value not in YES_NO_OPTIONS})
+    return YES_NO_OPTIONS + extra
+
+
+def to_frame(processes):
+    """공정명이 있는 공정만 행으로 담은 DataFrame (인덱스는 공정 id)"""
+    return processes.to_frame(GRID_FIELDS, processes.named_indices())
+
+
+def apply_frame(processes, frame):
+    """편집된 DataFrame 의 입력 열을 공정 표에 다시 쓴다 (빈 칸은 '')"""
+    index = [processes.index_of(process_id) for process_id in frame.index]
+    for field in HAZARD_INFO_FIELDS:
+        column = processes.column(field)
+        values = frame[field].astype(object).where(frame[field].notna(), '').tolist()
+        for idx, value in zip(index, values):
+            column[idx] = value
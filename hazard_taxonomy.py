@@ -0,0 +1,142 @@
+"""유해위험요인 분류 기준
+
+분류 기준은 hazard_taxonomy.json 에서 모듈 로드 시 한 번만 읽고, 화면과
+엑셀이 공통으로 쓰는 색인을 미리 만들어 둔다. 모든 구조는 불변이다.
+
+json 의 각 항목은 "1.1 끼임(...)" 같은 문자열이거나, KOSHA 코드 등 추가
+정보를 넣을 때는 {"label": "...", "kosha_code": "..."} 형태로 쓴다.
+빈 문자열은 표의 빈 칸이다.
+"""
+import json
+import os
+from types import MappingProxyType
+from typing import NamedTuple
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hazard_taxonomy.json')
+
+# 표 한 행의 칸 수
+SLOTS_PER_ROW = 3
+
+
+class HazardItem(NamedTuple):
+    position: int        # 전체 항목 중 순번 (0부터, 체크 상태 저장 위치)
+    code: str            # '1.1'
+    label: str           # '1.1 끼임(협착/감김/말림)'
+    category_idx: int
+    row_idx: int
+    slot_idx: int
+    key: str             # '{category_idx}_{row_idx}_{slot_idx}' (체크박스 위젯 키 접미어)
+    kosha_code: str = ''
+
+
+class HazardCategory(NamedTuple):
+    index: int
+    name: str
+    rows: tuple          # 행마다 SLOTS_PER_ROW 칸, 빈 칸은 None
+    items: tuple         # 이 분류의 항목 (순번 순)
+
+
+class Taxonomy:
+    """분류 기준과 미리 계산한 색인"""
+
+    __slots__ = ('version', 'categories', 'items', 'position_to_code', 'code_to_position')
+
+    def __init__(self, version, categories):
+        self.version = version
+        self.categories = categories
+        self.items = tuple(item for category in categories for item in category.items)
+        self.position_to_code = tuple(item.code for item in self.items)
+        self.code_to_position = MappingProxyType({item.code: item.position for item in self.items})
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _parse_item(entry):
+    if isinstance(entry, dict):
+        return entry.get('label', ''), entry.get('kosha_code', '')
+    return entry, ''
+
+
+def parse_taxonomy(data):
+    """json 으로 읽은 dict 를 Taxonomy 로 변환"""
+    categories = []
+    position = 0
+    for category_idx, category in enumerate(data['categories']):
+        rows = []
+        items = []
+        for row_idx, row in enumerate(category['rows']):
+            if len(row) > SLOTS_PER_ROW:
+                raise ValueError(f"{category['name']} {row_idx + 1}행: 한 행은 {SLOTS_PER_ROW}칸까지입니다")
+            slots = []
+            for slot_idx in range(SLOTS_PER_ROW):
+                label, kosha_code = _parse_item(row[slot_idx] if slot_idx < len(row) else '')
+                if not label:
+                    slots.append(None)
+                    continue
+                item = HazardItem(
+                    position=position,
+                    code=label.split(' ', 1)[0],
+                    label=label,
+                    category_idx=category_idx,
+                    row_idx=row_idx,
+                    slot_idx=slot_idx,
+                    key=f"{category_idx}_{row_idx}_{slot_idx}",
+                    kosha_code=kosha_code,
+                )
+                slots.append(item)
+                items.append(item)
+                position += 1
+            rows.append(tuple(slots))
+        categories.append(HazardCategory(category_idx, category['name'], tuple(rows), tuple(items)))
+
+    taxonomy = Taxonomy(data.get('version', 1), tuple(categories))
+    if len(taxonomy.code_to_position) != len(taxonomy.items):
+        raise ValueError("유해위험요인 코드가 중복되었습니다")
+    return taxonomy
+
+
+def load_taxonomy(path=DEFAULT_PATH):
+    with open(path, encoding='utf-8') as f:
+        return parse_taxonomy(json.load(f))
+
+
+TAXONOMY = load_taxonomy()
+
+
+# ---------------------------------------------------------------------------
+# 체크 상태 비트마스크
+# 공정별 체크 상태는 int 하나로 저장한다. 항목 순번(position)번째 비트가 1이면 체크.
+# 항목 이름은 저장하지 않고 화면/엑셀에서 TAXONOMY 로 찾는다.
+# ---------------------------------------------------------------------------
+
+def is_checked(mask, position):
+    return (mask >> position) & 1 == 1
+
+
+def set_checked(mask, position, checked):
+    if checked:
+        return mask | (1 << position)
+    return mask & ~(1 << position)
+
+
+def checked_positions(mask):
+    positions = []
+    position = 0
+    while mask:
+        if mask & 1:
+            positions.append(position)
+        mask >>= 1
+        position += 1
+    return positions
+
+
+def mask_from_codes(codes, taxonomy=TAXONOMY):
+    mask = 0
+    for code in codes:
+        mask |= 1 << taxonomy.code_to_position[code]
+    return mask
+
+
+def codes_from_mask(mask, taxonomy=TAXONOMY):
+    return [taxonomy.position_to_code[position] for position in checked_positions(mask)]
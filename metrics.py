@@ -0,0 +1,262 @@
+"""운영 지표 (Prometheus text 형식)
+
+여러 사용자가 동시에 쓰는 서버에서 모니터링이 읽어 갈 수 있도록 서버 프로세스
+전체의 지표를 모은다.
+- risk_rerun_duration_seconds: 스크립트 재실행 시간 (전체 / fragment)
+- risk_export_duration_seconds, risk_export_bytes: 엑셀 생성 시간과 크기 (시트 묶음별)
+- risk_export_requests_total: 엑셀 요청 수 (캐시 사용 여부별)
+- risk_sessions, risk_session_memory_bytes_total / _max: 세션 수와 세션 상태 크기 추정치
+
+환경 변수로 켠다 (둘 다 없으면 아무것도 모으지 않는다).
+- RISK_METRICS_PORT=9108: 127.0.0.1:9108/metrics 로 내보낸다
+  (RISK_METRICS_HOST 로 주소를 바꿀 수 있다)
+- RISK_METRICS_FILE=/var/lib/node_exporter/risk.prom: RISK_METRICS_INTERVAL 초
+  (기본 15)마다 파일로 쓴다 (node_exporter textfile collector 용)
+
+prometheus_client 없이 표준 라이브러리로만 text 형식을 만든다.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from perf_overlay import deep_sizeof
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(kb * 1024 for kb in (16, 64, 256, 1024, 4096, 16384, 65536))
+
+# 세션 상태 크기는 재실행마다 재면 비싸므로 세션마다 이 간격으로만 잰다
+SESSION_SAMPLE_SECONDS = 30
+# 이 시간 동안 재실행이 없던 세션은 끝난 것으로 본다
+SESSION_TTL_SECONDS = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self.values = {}  # 라벨 값 -> [버킷별 개수(+Inf 포함), 합]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[key] = counts, total + value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, [('le', bound)])
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f'{self.name}_sum{labels} {total}')
+                lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class SessionMemory:
+    """세션별 세션 상태 크기 추정치 (세션 수 / 합 / 최대 게이지로 내보낸다)"""
+
+    def __init__(self, sample_seconds=SESSION_SAMPLE_SECONDS, ttl_seconds=SESSION_TTL_SECONDS):
+        self.sample_seconds = sample_seconds
+        self.ttl_seconds = ttl_seconds
+        self.sessions = {}  # 세션 id -> [마지막 재실행 시각, 마지막으로 잰 시각, 바이트]
+        self._lock = threading.Lock()
+
+    def observe(self, session_id, state, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self.sessions.get(session_id)
+            if entry is not None and now - entry[1] < self.sample_seconds:
+                entry[0] = now
+                return
+        size = deep_sizeof({key: state[key] for key in list(state.keys())})
+        with self._lock:
+            self.sessions[session_id] = [now, now, size]
+
+    def render(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for session_id in [sid for sid, entry in self.sessions.items() if now - entry[0] > self.ttl_seconds]:
+                del self.sessions[session_id]
+            sizes = [entry[2] for entry in self.sessions.values()]
+        return [
+            '# HELP risk_sessions Sessions that reran within the TTL',
+            '# TYPE risk_sessions gauge',
+            f'risk_sessions {len(sizes)}',
+            '# HELP risk_session_memory_bytes_total Estimated session state size of all sessions',
+            '# TYPE risk_session_memory_bytes_total gauge',
+            f'risk_session_memory_bytes_total {sum(sizes)}',
+            '# HELP risk_session_memory_bytes_max Estimated session state size of the largest session',
+            '# TYPE risk_session_memory_bytes_max gauge',
+            f'risk_session_memory_bytes_max {max(sizes, default=0)}',
+        ]
+
+
+RERUN_DURATION = Histogram('risk_rerun_duration_seconds', 'Script rerun duration', DURATION_BUCKETS,
+                           ('kind',))
+EXPORT_DURATION = Histogram('risk_export_duration_seconds', 'Excel workbook build duration',
+                            DURATION_BUCKETS, ('export', 'engine'))
+EXPORT_BYTES = Histogram('risk_export_bytes', 'Excel workbook size', SIZE_BUCKETS, ('export', 'engine'))
+EXPORT_REQUESTS = Counter('risk_export_requests_total', 'Excel export requests', ('export', 'cached'))
+SESSION_MEMORY = SessionMemory()
+
+REGISTRY = (RERUN_DURATION, EXPORT_DURATION, EXPORT_BYTES, EXPORT_REQUESTS, SESSION_MEMORY)
+
+
+def enabled(environ=os.environ):
+    return bool(environ.get('RISK_METRICS_PORT') or environ.get('RISK_METRICS_FILE'))
+
+
+def observe_rerun(seconds, kind):
+    RERUN_DURATION.observe(seconds, kind=kind)
+
+
+def observe_export(export, engine, seconds, size):
+    EXPORT_DURATION.observe(seconds, export=export, engine=engine)
+    EXPORT_BYTES.observe(size, export=export, engine=engine)
+
+
+def observe_export_request(export, cached):
+    EXPORT_REQUESTS.inc(export=export, cached='true' if cached else 'false')
+
+
+def observe_session(session_id, state):
+    SESSION_MEMORY.observe(session_id, state)
+
+
+def render():
+    """모든 지표의 Prometheus text 형식 문자열"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 스크랩마다 서버 로그가 쌓이지 않도록
+        pass
+
+
+def _write_file(path):
+    """다른 프로세스가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓰고 바꿔 넣는다"""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(render())
+    os.replace(temp_path, path)
+
+
+def _write_file_forever(path, interval):
+    while True:
+        try:
+            _write_file(path)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def _start_http(environ):
+    global _started
+    try:
+        port = int(environ['RISK_METRICS_PORT'])
+    except ValueError:
+        logger.warning('RISK_METRICS_PORT 값이 포트 번호가 아닙니다 (%r) - HTTP 내보내기를 끕니다',
+                       environ['RISK_METRICS_PORT'])
+        return
+    address = (environ.get('RISK_METRICS_HOST', '127.0.0.1'), port)
+    try:
+        server = ThreadingHTTPServer(address, _MetricsHandler)
+    except (OSError, OverflowError) as e:
+        # OverflowError: 0~65535 밖의 포트 번호
+        logger.warning('운영 지표 HTTP 내보내기를 시작하지 못했습니다 (%s:%s): %s', *address, e)
+    else:
+        threading.Thread(target=server.serve_forever, name='risk-metrics-http', daemon=True).start()
+        _started = True
+
+
+def start_exporter(environ=os.environ):
+    """환경 변수대로 내보내기를 시작한다 (프로세스마다 한 번, 하나라도 켜졌으면 True)
+
+    포트를 이미 다른 프로세스(두 번째 worker 등)가 쓰고 있거나 포트 값이 잘못되었으면
+    경고만 남기고 HTTP 내보내기 없이 계속한다. RISK_METRICS_INTERVAL 이 숫자가
+    아니면 기본값(15초)을 쓴다.
+    """
+    global _started
+    if not enabled(environ):
+        return False
+    with _start_lock:
+        if _started:
+            return True
+        if environ.get('RISK_METRICS_PORT'):
+            _start_http(environ)
+        if environ.get('RISK_METRICS_FILE'):
+            try:
+                interval = float(environ.get('RISK_METRICS_INTERVAL', 15))
+            except ValueError:
+                logger.warning('RISK_METRICS_INTERVAL 값이 숫자가 아닙니다 (%r) - 15초마다 씁니다',
+                               environ['RISK_METRICS_INTERVAL'])
+                interval = 15
+            threading.Thread(target=_write_file_forever, args=(environ['RISK_METRICS_FILE'], interval),
+                             name='risk-metrics-file', daemon=True).start()
+            _started = True
+    return _started
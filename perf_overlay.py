@@ -0,0 +1,176 @@
+"""성능 오버레이
+
+'화면이 느리다'는 보고가 오면 주소에 ?perf=1 을 붙이거나 서버를 RISK_PERF=1
+환경 변수로 띄워서 켠다. 켜져 있으면 스크립트 실행마다 구간(세션 상태 초기화,
+탭 본문, 엑셀 생성, 자동 저장)별 시간, 세션 상태 키별 메모리 크기, 이번 실행의
+위젯 수를 사이드바에 보여 주고 서버 로그에도 한 줄 남긴다.
+
+RISK_PERF=memory 로 띄운 서버는 구간별 tracemalloc 최대 메모리도 잰다.
+tracemalloc 은 프로세스 전체에 하나뿐이라 세션마다 켜고 끌 수 없으므로, 서버
+프로세스가 떠 있는 동안 켜 둔다. 다른 세션의 할당도 같이 잡히므로 혼자 쓰는
+서버에서만 쓴다 (주소의 ?perf=memory 는 시간만 잰다). tracemalloc 은 실행을
+2~3배 느리게 하므로 시간은 참고만 한다.
+꺼져 있으면 section() 이 아무것도 하지 않는 컨텍스트를 돌려주므로 비용이 없다.
+"""
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+ENV_VAR = 'RISK_PERF'
+QUERY_PARAM = 'perf'
+MODE_TIME = 'time'
+MODE_MEMORY = 'memory'
+
+# 따로 보여 줄 세션 상태 키 (나머지는 '기타' 로 합친다)
+STATE_KEYS = ('processes', 'photos', 'hazard_classifications', 'exports', 'export_cache')
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_mode(value):
+    value = (value or '').strip().lower()
+    if value in ('', '0', 'false', 'off'):
+        return None
+    return MODE_MEMORY if value in ('mem', MODE_MEMORY) else MODE_TIME
+
+
+def perf_mode(query_params, environ=os.environ):
+    """켜져 있으면 MODE_TIME / MODE_MEMORY, 꺼져 있으면 None
+
+    MODE_MEMORY 는 서버 환경 변수로만 켠다 (주소로 요청하면 MODE_TIME).
+    """
+    mode = _parse_mode(query_params.get(QUERY_PARAM) or environ.get(ENV_VAR))
+    if mode == MODE_MEMORY and _parse_mode(environ.get(ENV_VAR)) != MODE_MEMORY:
+        return MODE_TIME
+    return mode
+
+
+def deep_sizeof(obj, seen=None):
+    """obj 와 그 안에 든 객체의 크기 합 (바이트, 같은 객체는 한 번만)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def state_sizes(state, keys=STATE_KEYS):
+    """세션 상태 -> [(키, 바이트)] (keys 순서, 나머지는 '기타')"""
+    seen = set()
+    sizes = [(key, deep_sizeof(state[key], seen)) for key in keys if key in state]
+    other = sum(deep_sizeof(state[key], seen) for key in list(state.keys()) if key not in keys)
+    sizes.append(('기타', other))
+    return sizes
+
+
+def widget_count():
+    """이번 실행에서 만든 위젯 수 (streamlit 내부 구조가 달라 알 수 없으면 None)"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return len(get_script_run_ctx().shared.widget_ids_this_run.snapshot())
+    except (AttributeError, ImportError):
+        return None
+
+
+class PerfRecorder:
+    """스크립트 실행 한 번의 구간별 시간 (mode 가 None 이면 아무것도 재지 않는다)"""
+
+    def __init__(self, mode=None):
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.sections = []  # (이름, 초, 구간 안에서 늘어난 tracemalloc 최대 바이트 또는 None)
+        self._open = {}
+        if mode == MODE_MEMORY and not tracemalloc.is_tracing():
+            # 끄지 않는다 - 같은 프로세스의 다른 세션이 재고 있을 수 있다
+            tracemalloc.start()
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    def begin(self, name):
+        """with 로 감쌀 수 없는 구간의 시작 (end(name) 과 짝)"""
+        if self.enabled:
+            current = 0
+            if self.mode == MODE_MEMORY:
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+            self._open[name] = (time.perf_counter(), current)
+
+    def end(self, name):
+        if self.enabled and name in self._open:
+            started, current = self._open.pop(name)
+            seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] - current if self.mode == MODE_MEMORY else None
+            self.sections.append((name, seconds, peak))
+
+    def section(self, name):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._section(name)
+
+    @contextlib.contextmanager
+    def _section(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def summary(self, state):
+        """json 으로 쓸 수 있는 이번 실행 요약"""
+        return {
+            'total_seconds': round(time.perf_counter() - self.started, 4),
+            'sections': [{'name': name, 'seconds': round(seconds, 4), 'peak_bytes': peak}
+                         for name, seconds, peak in self.sections],
+            'state_bytes': dict(state_sizes(state)),
+            'state_keys': len(state.keys()),
+            'widgets': widget_count(),
+        }
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f}{unit}'
+        size /= 1024
+    return f'{size:.1f}GB'
+
+
+def render(st, recorder):
+    """사이드바에 이번 실행 요약을 보여 주고 로그에 남긴다 (스크립트 맨 끝에서 부른다)"""
+    if not recorder.enabled:
+        return
+    summary = recorder.summary(st.session_state)
+    logger.info('perf %s', json.dumps(summary, ensure_ascii=False))
+
+    with st.sidebar.expander(f"⏱ 성능 ({summary['total_seconds'] * 1000:.0f}ms)", expanded=True):
+        lines = ["| 구간 | 시간 | 최대 메모리 |", "|---|---:|---:|"]
+        for section in summary['sections']:
+            peak = _format_bytes(section['peak_bytes']) if section['peak_bytes'] is not None else '-'
+            lines.append(f"| {section['name']} | {section['seconds'] * 1000:.1f}ms | {peak} |")
+        st.markdown('\n'.join(lines))
+
+        lines = ["| 세션 상태 | 크기 |", "|---|---:|"]
+        for key, size in summary['state_bytes'].items():
+            lines.append(f"| {key} | {_format_bytes(size)} |")
+        st.markdown('\n'.join(lines))
+        widgets = summary['widgets'] if summary['widgets'] is not None else '?'
+        st.caption(f"위젯 {widgets}개 · 세션 상태 키 {summary['state_keys']}개")
@@ -0,0 +1,132 @@
+"""공정 사진 처리
+
+업로드된 사진은 한 번만 디코딩해서 화면용 썸네일과 엑셀용 JPEG 를 만들어
+두고 원본은 버린다. 사진은 원본 내용의 SHA-256 으로 구분하므로 같은 사진을
+여러 번 올려도 한 번만 처리하고 한 벌만 저장한다. 공정 표의 'photo' 칸에는
+이 해시를 넣는다.
+"""
+import hashlib
+import io
+from typing import NamedTuple
+
+from PIL import Image, ImageOps
+
+# 화면용 썸네일 긴 변 (px)
+THUMBNAIL_SIZE = 480
+THUMBNAIL_QUALITY = 80
+
+# 엑셀용 JPEG 긴 변 (px) 과 파일 크기 상한
+EXPORT_SIZE = 1280
+EXPORT_MAX_BYTES = 300 * 1024
+# 크기 상한을 넘으면 차례로 낮춰 보는 JPEG 품질
+EXPORT_QUALITIES = (85, 75, 65, 55)
+
+
+class ProcessPhoto(NamedTuple):
+    digest: str       # 원본 내용의 SHA-256
+    thumbnail: bytes  # 화면용 JPEG
+    data: bytes       # 엑셀용 JPEG
+    width: int        # data 의 픽셀 크기
+    height: int
+
+
+def photo_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _encode_jpeg(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _open_rgb(data, size):
+    image = Image.open(io.BytesIO(data))
+    # JPEG 은 디코딩할 때부터 1/2 ~ 1/8 로 줄여 읽는다 (size 보다 작아지지는 않음)
+    image.draft('RGB', (size, size))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # 투명한 부분은 흰 바탕으로
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _fit_jpeg(image, max_bytes):
+    """max_bytes 이하가 될 때까지 품질을 낮추고, 그래도 크면 크기를 3/4 씩 줄인다"""
+    while True:
+        for quality in EXPORT_QUALITIES:
+            data = _encode_jpeg(image, quality)
+            if len(data) <= max_bytes:
+                return image, data
+        if max(image.size) <= THUMBNAIL_SIZE:
+            return image, data
+        image = image.resize((max(1, image.width * 3 // 4), max(1, image.height * 3 // 4)),
+                             Image.LANCZOS)
+
+
+def process_photo(data, digest=None, export_size=EXPORT_SIZE, max_bytes=EXPORT_MAX_BYTES):
+    """원본 이미지 바이트 -> ProcessPhoto"""
+    try:
+        image = _open_rgb(data, export_size)
+        image.thumbnail((export_size, export_size), Image.LANCZOS, reducing_gap=3.0)
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"사진을 읽을 수 없습니다: {exc}") from exc
+
+    image, export_data = _fit_jpeg(image, max_bytes)
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+    return ProcessPhoto(
+        digest=digest or photo_digest(data),
+        thumbnail=_encode_jpeg(thumbnail, THUMBNAIL_QUALITY),
+        data=export_data,
+        width=image.width,
+        height=image.height,
+    )
+
+
+class PhotoStore:
+    """해시 -> ProcessPhoto"""
+
+    def __init__(self):
+        self.photos = {}
+        # 업로드 file_id -> 해시 (같은 업로드를 다시 읽지 않도록)
+        self.sources = {}
+
+    def __len__(self):
+        return len(self.photos)
+
+    def __contains__(self, digest):
+        return digest in self.photos
+
+    def get(self, digest):
+        return self.photos.get(digest)
+
+    def add(self, photo):
+        self.photos[photo.digest] = photo
+        return photo.digest
+
+    def ingest(self, data):
+        """원본 바이트를 처리해서 저장하고 해시를 돌려준다 (이미 있으면 처리하지 않음)"""
+        digest = photo_digest(data)
+        if digest not in self.photos:
+            self.photos[digest] = process_photo(data, digest)
+        return digest
+
+    def ingest_upload(self, upload):
+        """st.file_uploader 결과를 저장하고 해시를 돌려준다"""
+        digest = self.sources.get(upload.file_id)
+        if digest is None or digest not in self.photos:
+            digest = self.ingest(upload.getvalue())
+            self.sources[upload.file_id] = digest
+        return digest
+
+    def prune(self, keep):
+        """keep 에 없는 사진을 버린다"""
+        keep = set(keep)
+        for digest in [digest for digest in self.photos if digest not in keep]:
+            del self.photos[digest]
+        self.sources = {file_id: digest for file_id, digest in self.sources.items()
+                        if digest in self.photos}
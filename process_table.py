@@ -0,0 +1,178 @@
+"""공정 표
+
+공정별 입력값을 필드마다 list 하나(열)로 모아 둔다. 사업장 개요 탭의 공정
+카드 필드와 위험정보 탭의 공정별 입력값이 모두 여기 들어 있고, 공정 수는
+열 길이 하나로 정해진다.
+
+공정마다 바뀌지 않는 id(uuid)가 있다. 위젯 키와 유해위험요인 분류처럼
+공정에 딸린 상태는 순번이 아니라 id 로 저장하므로, 공정을 끼워 넣거나
+지우거나 옮겨도 따로 옮길 필요가 없다.
+
+표[idx] 는 복사본이 아니라 idx 번째 행을 가리키는 ProcessRecord 이므로
+process['name'] 처럼 읽고 쓰면 열에 바로 반영된다. 행을 지우거나 옮기면
+그 뒤 행의 순번이 바뀌므로 기존 ProcessRecord 는 다시 얻어야 한다.
+"""
+import uuid
+
+# 사업장 개요 탭 공정 카드 필드
+CARD_FIELDS = ('name', 'photo', 'description', 'equipment', 'hazardous_material', 'hazardous_factor')
+# 위험정보 탭 공정별 입력 필드
+HAZARD_INFO_FIELDS = ('qty', 'amount', 'time', 'accident', 'near_miss', 'workers', 'contract',
+                      'transport', 'permit', 'measurement', 'special_edu')
+FIELDS = ('id',) + CARD_FIELDS + HAZARD_INFO_FIELDS
+
+# 유/무 선택 필드와 선택지
+YES_NO_FIELDS = ('contract', 'permit', 'measurement')
+YES_NO_OPTIONS = ["", "유", "무"]
+# 다른 프로그램이나 손으로 고친 엑셀에서 흔히 쓰는 표기 -> 유/무
+YES_NO_ALIASES = {
+    'o': "유", '○': "유", 'y': "유", 'yes': "유", '예': "유", '있음': "유",
+    'x': "무", '×': "무", 'n': "무", 'no': "무", '아니오': "무", '없음': "무",
+}
+
+# 새 공정의 기본값 (없는 필드는 '')
+DEFAULTS = {'photo': None}
+
+
+def normalize_yes_no(value):
+    """유/무 필드 값 -> 선택지 값 (알 수 없는 값은 지우지 않고 그대로 둔다)"""
+    if value is None:
+        return ''
+    text = str(value).strip()
+    if text in YES_NO_OPTIONS:
+        return text
+    return YES_NO_ALIASES.get(text.lower(), text)
+
+
+class ProcessRecord:
+    """표의 한 행 - dict 처럼 process['name'] 으로 읽고 쓴다"""
+
+    __slots__ = ('table', 'idx')
+
+    def __init__(self, table, idx):
+        self.table = table
+        self.idx = idx
+
+    def __getitem__(self, field):
+        return self.table.columns[field][self.idx]
+
+    def __setitem__(self, field, value):
+        self.table.columns[field][self.idx] = value
+
+    def get(self, field, default=None):
+        column = self.table.columns.get(field)
+        return default if column is None else column[self.idx]
+
+
+class ProcessTable:
+    """필드별 열(list)로 저장한 공정 목록"""
+
+    __slots__ = ('columns', '_positions')
+
+    def __init__(self, count=0):
+        self.columns = {field: [] for field in FIELDS}
+        self._positions = None
+        for _ in range(count):
+            self.append()
+
+    @classmethod
+    def from_columns(cls, columns):
+        """{필드: 열} 로 표를 만든다 (없는 필드는 기본값, 없는 id 는 새로 만든다)"""
+        lengths = {len(column) for field, column in columns.items() if field in FIELDS}
+        if len(lengths) > 1:
+            raise ValueError("공정 열의 길이가 서로 다릅니다")
+        count = lengths.pop() if lengths else 0
+        table = cls()
+        for field in FIELDS:
+            column = columns.get(field)
+            table.columns[field] = list(column) if column is not None else [DEFAULTS.get(field, '')] * count
+        # 불러온 파일의 'O', '있음' 같은 표기를 선택지 값으로 맞춘다
+        for field in YES_NO_FIELDS:
+            table.columns[field] = [normalize_yes_no(value) for value in table.columns[field]]
+        ids = table.columns['id']
+        for idx, process_id in enumerate(ids):
+            if not process_id:
+                ids[idx] = uuid.uuid4().hex
+        if len(set(ids)) != len(ids):
+            raise ValueError("공정 id 가 중복되었습니다")
+        return table
+
+    def __len__(self):
+        return len(self.columns['name'])
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return ProcessRecord(self, idx)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield ProcessRecord(self, idx)
+
+    def index_of(self, process_id):
+        """id -> 현재 순번 (행 구성이 바뀔 때만 색인을 다시 만든다)"""
+        if self._positions is None:
+            self._positions = {pid: idx for idx, pid in enumerate(self.columns['id'])}
+        return self._positions[process_id]
+
+    def by_id(self, process_id):
+        return ProcessRecord(self, self.index_of(process_id))
+
+    def column(self, field):
+        """필드 열 (복사하지 않은 list 그대로 - 값을 바꾸면 표에 바로 반영된다)"""
+        return self.columns[field]
+
+    def append(self, **values):
+        return self.insert(len(self), **values)
+
+    def insert(self, idx, **values):
+        unknown = set(values) - set(FIELDS)
+        if unknown:
+            raise KeyError(f"알 수 없는 공정 필드: {', '.join(sorted(unknown))}")
+        if not values.get('id'):
+            values['id'] = uuid.uuid4().hex
+        elif values['id'] in self.columns['id']:
+            raise ValueError(f"공정 id 가 중복되었습니다: {values['id']}")
+        for field, column in self.columns.items():
+            column.insert(idx, values.get(field, DEFAULTS.get(field, '')))
+        self._positions = None
+        return idx
+
+    def delete(self, idx):
+        """idx 번째 공정을 지우고 그 값을 dict 로 돌려준다"""
+        self._positions = None
+        return {field: column.pop(idx) for field, column in self.columns.items()}
+
+    def move(self, src, dst):
+        """src 번째 공정을 dst 자리로 옮긴다 (필드마다 list 연산 한 번)"""
+        for column in self.columns.values():
+            column.insert(dst, column.pop(src))
+        self._positions = None
+
+    def named_indices(self):
+        """공정명이 있는 공정의 순번 목록"""
+        return [idx for idx, name in enumerate(self.columns['name']) if name]
+
+    def find(self, field, query):
+        """field 값에 query 가 들어 있는 첫 공정의 순번 (없으면 -1)"""
+        for idx, value in enumerate(self.columns[field]):
+            if query in value:
+                return idx
+        return -1
+
+    def to_frame(self, fields=FIELDS[1:], rows=None):
+        """fields 열만 담은 DataFrame (인덱스는 공정 id, rows 로 행을 고를 수 있다)"""
+        # pandas 는 위험정보 탭의 표 편집에서만 쓰므로 처음 쓸 때 가져온다 (앱 시작과
+        # 프로젝트 불러오기 / 엑셀 생성에는 필요 없다)
+        import pandas as pd
+
+        if rows is None:
+            rows = range(len(self))
+        ids = self.columns['id']
+        data = {}
+        for field in fields:
+            column = self.columns[field]
+            data[field] = [column[idx] for idx in rows]
+        return pd.DataFrame(data, index=pd.Index([ids[idx] for idx in rows], name='id'), dtype=object)
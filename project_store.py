@@ -0,0 +1,174 @@
+"""프로젝트 저장/불러오기
+
+작성 중인 내용 전체를 zip 파일 하나(.rap)로 저장한다.
+- project.json: 입력값 (형식 이름과 버전 포함, deflate 압축)
+- blobs/<해시>.jpg, blobs/<해시>.thumb.jpg: 공정 사진의 엑셀용 JPEG 와 썸네일
+
+사진은 photo_pipeline 의 내용 해시로 한 장씩만 저장하고, 이미 JPEG 이므로
+다시 압축하지 않는다. 불러올 때 사진을 다시 디코딩하지 않는다.
+유해위험요인 체크 상태는 항목 순번 비트마스크 대신 항목 코드('1.1')로
+저장하므로 분류 기준의 항목 순서가 바뀌어도 그대로 읽힌다.
+"""
+import json
+import zipfile
+from datetime import date
+from io import BytesIO
+
+from export_cache import HAZARD_INFO_TOP_KEYS
+from hazard_taxonomy import TAXONOMY, codes_from_mask, mask_from_codes
+from photo_pipeline import PhotoStore, ProcessPhoto
+from process_table import FIELDS, ProcessTable
+
+PROJECT_FORMAT = 'risk-assessment-project'
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = 'rap'
+PROJECT_MIME = 'application/zip'
+
+PROJECT_JSON = 'project.json'
+BLOB_DIR = 'blobs/'
+
+# 프로젝트에 들어가는 세션 상태 키
+PROJECT_KEYS = ('form_data', 'business_info', 'processes', 'hazard_classifications',
+                'photos') + HAZARD_INFO_TOP_KEYS
+
+
+def _blob_names(digest):
+    return f'{BLOB_DIR}{digest}.jpg', f'{BLOB_DIR}{digest}.thumb.jpg'
+
+
+def snapshot_state(state, taxonomy=TAXONOMY):
+    """세션 상태 -> json 으로 쓸 수 있는 dict (사진은 해시와 크기만)"""
+    processes = state.get('processes') or ProcessTable()
+    photos = state.get('photos') or PhotoStore()
+
+    business_info = dict(state.get('business_info') or {})
+    if isinstance(business_info.get('evaluation_date'), date):
+        business_info['evaluation_date'] = business_info['evaluation_date'].isoformat()
+
+    classifications = {}
+    for process_id, classification in (state.get('hazard_classifications') or {}).items():
+        classifications[process_id] = {
+            'manufacturing_process': classification.get('manufacturing_process', ''),
+            'classification_code': classification.get('classification_code', ''),
+            'checked': codes_from_mask(classification.get('checked', 0), taxonomy),
+        }
+
+    photo_sizes = {}
+    for digest in processes.column('photo'):
+        photo = photos.get(digest) if digest else None
+        if photo:
+            photo_sizes[digest] = [photo.width, photo.height]
+
+    return {
+        'format': PROJECT_FORMAT,
+        'version': PROJECT_VERSION,
+        'form_data': state.get('form_data'),
+        'business_info': business_info,
+        'hazard_info': {key: state.get(key, '') for key in HAZARD_INFO_TOP_KEYS},
+        'processes': {field: processes.column(field) for field in FIELDS},
+        'hazard_classifications': classifications,
+        'photos': photo_sizes,
+    }
+
+
+def _check_snapshot(snapshot):
+    """snapshot_state() 모양이 아니면 ValueError (손상되었거나 손으로 고친 파일)"""
+    if not isinstance(snapshot, dict) or snapshot.get('format') != PROJECT_FORMAT:
+        raise ValueError("위험성평가 프로젝트 파일이 아닙니다")
+    if not isinstance(snapshot.get('version', 0), int):
+        raise ValueError("프로젝트 파일의 버전을 읽을 수 없습니다")
+    for section in ('form_data', 'business_info', 'hazard_info', 'processes', 'hazard_classifications',
+                    'photos'):
+        if snapshot.get(section) is not None and not isinstance(snapshot[section], dict):
+            raise ValueError(f"프로젝트 파일이 손상되었습니다 ({section})")
+
+    approvers = (snapshot.get('form_data') or {}).get('approvers', [])
+    if not isinstance(approvers, list) or not all(isinstance(approver, dict) for approver in approvers):
+        raise ValueError("프로젝트 파일이 손상되었습니다 (form_data)")
+    evaluation_date = (snapshot.get('business_info') or {}).get('evaluation_date')
+    if evaluation_date and not isinstance(evaluation_date, str):
+        raise ValueError("프로젝트 파일이 손상되었습니다 (business_info)")
+
+    columns = snapshot.get('processes') or {}
+    if not all(isinstance(column, list) for column in columns.values()):
+        raise ValueError("프로젝트 파일이 손상되었습니다 (processes)")
+    if len({len(column) for column in columns.values()}) > 1:
+        raise ValueError("공정 열의 길이가 서로 다릅니다")
+    for classification in (snapshot.get('hazard_classifications') or {}).values():
+        if not isinstance(classification, dict) or not isinstance(classification.get('checked', []), list):
+            raise ValueError("프로젝트 파일이 손상되었습니다 (hazard_classifications)")
+    for size in (snapshot.get('photos') or {}).values():
+        if not isinstance(size, list) or len(size) != 2:
+            raise ValueError("프로젝트 파일이 손상되었습니다 (photos)")
+
+
+def restore_state(snapshot, taxonomy=TAXONOMY):
+    """snapshot_state() 결과 -> 세션 상태에 넣을 {키: 값} (사진 제외)"""
+    _check_snapshot(snapshot)
+    if snapshot.get('version', 0) > PROJECT_VERSION:
+        raise ValueError(f"이 프로그램보다 새 버전(v{snapshot['version']})에서 저장한 파일입니다")
+
+    business_info = dict(snapshot.get('business_info') or {})
+    if business_info.get('evaluation_date'):
+        business_info['evaluation_date'] = date.fromisoformat(business_info['evaluation_date'])
+
+    classifications = {}
+    for process_id, classification in snapshot.get('hazard_classifications', {}).items():
+        classifications[process_id] = {
+            'manufacturing_process': classification.get('manufacturing_process', ''),
+            'classification_code': classification.get('classification_code', ''),
+            # 분류 기준에서 빠진 항목은 버린다
+            'checked': mask_from_codes([code for code in classification.get('checked', [])
+                                        if code in taxonomy.code_to_position], taxonomy),
+        }
+
+    state = {
+        'processes': ProcessTable.from_columns(snapshot.get('processes', {})),
+        'hazard_classifications': classifications,
+    }
+    # 비어 있으면 넣지 않는다 (화면에서 기본값으로 초기화)
+    if snapshot.get('form_data'):
+        state['form_data'] = snapshot['form_data']
+    if business_info:
+        state['business_info'] = business_info
+    hazard_info = snapshot.get('hazard_info', {})
+    for key in HAZARD_INFO_TOP_KEYS:
+        state[key] = hazard_info.get(key, '')
+    return state
+
+
+def save_project(state):
+    """세션 상태 -> 프로젝트 파일 바이트"""
+    snapshot = snapshot_state(state)
+    photos = state.get('photos')
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w') as archive:
+        archive.writestr(PROJECT_JSON, json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')),
+                         compress_type=zipfile.ZIP_DEFLATED)
+        for digest in snapshot['photos']:
+            photo = photos.get(digest)
+            data_name, thumbnail_name = _blob_names(digest)
+            archive.writestr(data_name, photo.data)
+            archive.writestr(thumbnail_name, photo.thumbnail)
+    return output.getvalue()
+
+
+def load_project(data):
+    """프로젝트 파일 바이트 -> 세션 상태에 넣을 {키: 값} ('photos' 포함)"""
+    try:
+        archive = zipfile.ZipFile(BytesIO(data))
+        snapshot = json.loads(archive.read(PROJECT_JSON))
+    except (zipfile.BadZipFile, KeyError, ValueError) as exc:
+        raise ValueError("프로젝트 파일을 읽을 수 없습니다") from exc
+
+    state = restore_state(snapshot)
+    photos = PhotoStore()
+    for digest, (width, height) in snapshot.get('photos', {}).items():
+        data_name, thumbnail_name = _blob_names(digest)
+        try:
+            photos.add(ProcessPhoto(digest, archive.read(thumbnail_name), archive.read(data_name),
+                                    width, height))
+        except KeyError as exc:
+            raise ValueError(f"프로젝트 파일에 사진이 빠져 있습니다: {digest[:12]}") from exc
+    state['photos'] = photos
+    return state
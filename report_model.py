@@ -0,0 +1,124 @@
+"""위험성평가 결과서 데이터 모델
+
+엑셀 시트 빌더(excel_export.render_workbook)가 읽는 값만 담은 불변 레코드.
+세션 상태(또는 같은 키를 가진 dict)에서 report_from_state() 로 만든다.
+표준 라이브러리만 쓰므로 일괄 생성이나 벤치마크에서 streamlit / pandas 없이
+결과서를 만들 수 있다.
+"""
+from typing import NamedTuple
+
+
+class Approver(NamedTuple):
+    position: str = ''
+    name: str = ''
+
+
+class Cover(NamedTuple):
+    """표지"""
+    year: str = ''          # '24' -> '2024년도'
+    company_name: str = ''
+    address: str = ''
+    phone: str = ''
+    fax: str = ''
+    approvers: tuple = ()   # Approver (결재란 칸 순서)
+
+    @classmethod
+    def from_dict(cls, form_data):
+        return cls(
+            year=form_data.get('year', ''),
+            company_name=form_data.get('company_name', ''),
+            address=form_data.get('address', ''),
+            phone=form_data.get('phone', ''),
+            fax=form_data.get('fax', ''),
+            approvers=tuple(Approver(approver.get('position', ''), approver.get('name', ''))
+                            for approver in form_data.get('approvers', ())),
+        )
+
+
+class BusinessInfo(NamedTuple):
+    """사업장정보 (엑셀 헤더는 필드 이름 그대로)"""
+    business_name: str = ''
+    main_product: str = ''
+    evaluation_date: object = ''  # datetime.date 또는 ''
+    representative: str = ''
+    employee_count: str = ''
+    evaluator: str = ''
+
+
+class Process(NamedTuple):
+    """공정 카드 (공정정보 / 공정도 시트)"""
+    id: str
+    name: str
+    photo: object = None    # 사진 해시 (photo_pipeline)
+    description: str = ''
+    equipment: str = ''
+    hazardous_material: str = ''
+    hazardous_factor: str = ''
+
+
+class HazardInfo(NamedTuple):
+    """위험정보 시트 상단"""
+    industry_name: str = ''
+    product_name: str = ''
+    raw_material: str = ''
+    workers_info: str = ''
+
+
+class HazardInfoRow(NamedTuple):
+    """위험정보 시트 공정 한 줄 (필드 순서 = 시트 열 순서 A~N)"""
+    name: str
+    equipment: str = ''
+    qty: str = ''
+    hazardous_material: str = ''
+    amount: str = ''
+    time: str = ''
+    accident: str = ''
+    near_miss: str = ''
+    workers: str = ''
+    contract: str = ''
+    transport: str = ''
+    permit: str = ''
+    measurement: str = ''
+    special_edu: str = ''
+
+
+class HazardClassification(NamedTuple):
+    manufacturing_process: str = ''
+    classification_code: str = ''
+    checked: int = 0        # 항목 순번 비트마스크 (hazard_taxonomy)
+
+
+class Report(NamedTuple):
+    cover: object                 # Cover, 표지를 입력한 적이 없으면 None
+    business_info: BusinessInfo
+    processes: tuple              # Process - 공정명이 있는 공정만, 공정 순서대로
+    hazard_info: HazardInfo
+    hazard_info_rows: tuple       # HazardInfoRow - processes 와 같은 순서
+    hazard_classifications: dict  # 공정 id -> HazardClassification (입력한 공정만)
+    photos: object = None         # 사진 해시로 사진을 찾는 photo_pipeline.PhotoStore
+
+
+def _record(record_type, values):
+    """dict 처럼 읽히는 값(dict, ProcessRecord)에서 record_type 필드만 골라 만든다"""
+    defaults = record_type._field_defaults
+    return record_type(*(values.get(field, defaults.get(field, '')) for field in record_type._fields))
+
+
+def report_from_state(state):
+    """세션 상태(또는 같은 키를 가진 dict) -> Report"""
+    named = [process for process in state.get('processes', []) if process['name']]
+    process_ids = {process['id'] for process in named}
+    form_data = state.get('form_data')
+    return Report(
+        cover=Cover.from_dict(form_data) if form_data else None,
+        business_info=_record(BusinessInfo, state.get('business_info') or {}),
+        processes=tuple(_record(Process, process) for process in named),
+        hazard_info=_record(HazardInfo, state),
+        hazard_info_rows=tuple(_record(HazardInfoRow, process) for process in named),
+        hazard_classifications={
+            process_id: _record(HazardClassification, classification)
+            for process_id, classification in (state.get('hazard_classifications') or {}).items()
+            if process_id in process_ids
+        },
+        photos=state.get('photos'),
+    )
@@ -0,0 +1,77 @@
+"""autosave 저널 / 스냅숏 / 사진 정리 - 복구한 입력이 마지막 입력과 같은지 확인한다
+
+저널이 길어지면 스냅숏으로 합치고 쓰지 않는 사진을 지우므로, 그 사이에 공정을
+지우거나 옮겨도 복구 결과가 어긋나지 않아야 한다.
+
+    python -m pytest -q test_autosave.py
+"""
+import sqlite3
+
+import pytest
+
+from autosave import Autosave
+from benchmark import synthetic_state
+from report_model import report_from_state
+
+DELTA_COUNT = 120
+
+
+@pytest.fixture
+def state():
+    # 사진 2장을 공정 4개가 돌려 쓴다 (1, 3번 공정이 두 번째 사진)
+    return synthetic_state(4, photo_count=2)
+
+
+def _photo_digests(path, project_id):
+    with sqlite3.connect(path) as conn:
+        return {row[0] for row in conn.execute('SELECT digest FROM photos WHERE project_id = ?', (project_id,))}
+
+
+def _assert_same_report(recovered, state):
+    # 마지막 필드(photos)는 PhotoStore 객체이므로 사진은 해시로 따로 비교한다
+    assert report_from_state(recovered)[:-1] == report_from_state(state)[:-1]
+    used = {process['photo'] for process in state['processes'] if process['photo']}
+    # 쓰지 않는 사진은 다음 스냅숏 때까지 남아 있을 수 있다
+    assert used <= set(recovered['photos'].photos)
+    return used
+
+
+def test_record_only_changed_keys(tmp_path, state):
+    autosave = Autosave(str(tmp_path / 'autosave.sqlite3'))
+    assert autosave.record(state) > 0
+    assert autosave.record(state) == 0
+    state['processes'][0]['qty'] = '99'
+    assert autosave.record(state) == 1
+
+
+def test_recover_after_journal_compaction_delete_and_move(tmp_path, state):
+    path = str(tmp_path / 'autosave.sqlite3')
+    autosave = Autosave(path)
+    autosave.record(state)
+    processes = state['processes']
+    second_photo = processes[1]['photo']
+
+    for step in range(DELTA_COUNT):
+        processes[step % len(processes)]['qty'] = str(step)
+        assert autosave.record(state) == 1
+        if step == DELTA_COUNT // 2:
+            autosave.compact()
+
+    # 공정 삭제 (화면의 delete_process 와 같이 분류도 지운다)와 이동
+    removed = processes.delete(1)
+    state['hazard_classifications'].pop(removed['id'], None)
+    processes.move(0, 2)
+    # 두 번째 사진을 쓰던 나머지 공정의 사진도 지운다
+    for process in processes:
+        if process['photo'] == second_photo:
+            process['photo'] = None
+    autosave.record(state)
+
+    # 중간 스냅숏 + 그 뒤 저널로 복구
+    _assert_same_report(Autosave(path, autosave.project_id).recover(), state)
+
+    autosave.compact()
+    recovered = Autosave(path, autosave.project_id).recover()
+    used = _assert_same_report(recovered, state)
+    assert second_photo not in used
+    assert set(recovered['photos'].photos) == _photo_digests(path, autosave.project_id) == used
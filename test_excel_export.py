@@ -0,0 +1,124 @@
+"""excel_export 로 만든 결과서를 다시 열어 셀 값, 병합 범위, 사진 파일을 확인한다
+
+엔진 두 가지 모두 라이브러리 내부 구조에 기대는 부분이 있다.
+- xlsxwriter: constant_memory 모드의 여러 행 병합 (worksheet.merge 에 직접 등록),
+  링크처럼 보이는 문자열 (strings_to_urls)
+- openpyxl: 겹침 검사 없는 병합 (merged_cells.ranges 에 직접 등록),
+  같은 사진을 한 파일로 저장 (_SharedImage.path, _SharedMediaWriter)
+라이브러리를 올렸을 때 결과서가 조용히 깨지지 않도록 여기서 잡는다.
+
+    python -m pytest -q test_excel_export.py
+"""
+import posixpath
+import re
+from io import BytesIO
+from zipfile import ZipFile
+
+import openpyxl
+import pytest
+
+from benchmark import synthetic_state
+from excel_export import ENGINES, REPORT_SHEETS, build_workbook
+from hazard_taxonomy import TAXONOMY
+
+PROCESS_COUNT = 7
+PHOTO_COUNT = 2
+
+
+# 링크처럼 보이는 입력 (xlsxwriter 는 기본값이면 링크로 바꾸고, 2079자를 넘으면 버린다)
+URL_TEXT = 'https://example.com/msds/toluene'
+LONG_URL_TEXT = 'http://example.com/' + 'a' * 2100
+
+
+@pytest.fixture(scope='module')
+def state():
+    # 사진 2장을 공정 7개가 돌려 쓴다 (같은 사진이 여러 번 들어간다)
+    state = synthetic_state(PROCESS_COUNT, photo_count=PHOTO_COUNT)
+    state['form_data']['address'] = URL_TEXT
+    state['processes'][0]['description'] = LONG_URL_TEXT
+    state['processes'][1]['equipment'] = URL_TEXT
+    return state
+
+
+@pytest.fixture(scope='module')
+def workbooks(state):
+    return {engine: build_workbook(state, REPORT_SHEETS, engine=engine) for engine in ENGINES}
+
+
+def _merged_ranges(data):
+    workbook = openpyxl.load_workbook(BytesIO(data))
+    return {sheet.title: {str(cell_range) for cell_range in sheet.merged_cells.ranges}
+            for sheet in workbook.worksheets}
+
+
+def _cell_values(data):
+    """{시트 이름: {셀 주소: 값}} (빈 셀 제외)"""
+    workbook = openpyxl.load_workbook(BytesIO(data))
+    return {sheet.title: {cell.coordinate: cell.value for row in sheet.iter_rows() for cell in row
+                          if cell.value is not None}
+            for sheet in workbook.worksheets}
+
+
+def _media_parts(data):
+    """(xl/media 파일 목록, 그림 관계가 가리키는 파일 집합, 시트에 놓인 그림 수)"""
+    with ZipFile(BytesIO(data)) as archive:
+        names = archive.namelist()
+        media = [name for name in names if name.startswith('xl/media/')]
+        targets = set()
+        pictures = 0
+        for name in names:
+            if re.fullmatch(r'xl/drawings/_rels/drawing\d+\.xml\.rels', name):
+                rels = archive.read(name).decode('utf-8')
+                for target in re.findall(r'Target="([^"]+)"', rels):
+                    # openpyxl 은 /xl/media/... (절대), xlsxwriter 는 ../media/... (상대)
+                    targets.add(posixpath.normpath(posixpath.join('/xl/drawings', target))[1:])
+            elif re.fullmatch(r'xl/drawings/drawing\d+\.xml', name):
+                pictures += len(re.findall(r'<(?:\w+:)?pic>', archive.read(name).decode('utf-8')))
+    return media, targets, pictures
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_merged_ranges(workbooks, engine):
+    merged = _merged_ranges(workbooks[engine])
+    workbook = openpyxl.load_workbook(BytesIO(workbooks[engine]))
+
+    assert {'C2:E3', 'B5:F7', 'B10:B12'} <= merged['표지']
+    assert workbook['표지']['B5'].value == "위험성평가 결과서"
+
+    # 분류표의 여러 행 병합 (분류 번호 / 분야) - 공정마다 항목이 두 줄 이상인 분류 수만큼
+    multi_row = [category for category in TAXONOMY.categories if len(category.rows) > 1]
+    classification = workbook['유해위험요인분류']
+    column_a = [cell_range for cell_range in classification.merged_cells.ranges
+                if cell_range.min_col == cell_range.max_col == 1 and cell_range.max_row > cell_range.min_row]
+    assert len(column_a) == PROCESS_COUNT * len(multi_row)
+    values = sorted(classification.cell(cell_range.min_row, 1).value for cell_range in column_a)
+    assert values == sorted([category.index + 1 for category in multi_row] * PROCESS_COUNT)
+
+
+def test_engines_merge_the_same_ranges(workbooks):
+    merged = [_merged_ranges(data) for data in workbooks.values()]
+    assert all(ranges == merged[0] for ranges in merged[1:])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_media_parts(workbooks, engine):
+    media, targets, pictures = _media_parts(workbooks[engine])
+    # 공정정보 시트와 공정도 시트에 공정마다 그림 하나씩
+    assert pictures == 2 * PROCESS_COUNT
+    # 같은 사진은 파일 하나를 같이 가리킨다
+    assert len(media) == PHOTO_COUNT
+    assert targets == set(media)
+
+
+def test_engines_write_the_same_values(workbooks):
+    values = [_cell_values(data) for data in workbooks.values()]
+    assert all(cells == values[0] for cells in values[1:])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_url_like_text_is_written_as_text(workbooks, engine):
+    workbook = openpyxl.load_workbook(BytesIO(workbooks[engine]))
+    cells = [cell for sheet in workbook.worksheets for row in sheet.iter_rows() for cell in row
+             if isinstance(cell.value, str) and cell.value.startswith('http')]
+    assert {cell.value for cell in cells} == {URL_TEXT, LONG_URL_TEXT}
+    assert not any(cell.hyperlink for cell in cells)
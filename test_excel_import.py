@@ -0,0 +1,34 @@
+"""excel_import 로 결과서를 다시 읽으면 내보낸 입력과 같은 결과서가 되는지 확인한다
+
+결과서에는 공정 id 와 사진이 없으므로 (read_only 로 읽어 그림은 가져오지
+않는다) 공정은 id 대신 순서로 비교하고, 사진 없는 상태로 확인한다.
+
+    python -m pytest -q test_excel_import.py
+"""
+import pytest
+
+from benchmark import synthetic_state
+from excel_export import ENGINES, REPORT_SHEETS, build_workbook
+from excel_import import import_workbook
+from report_model import report_from_state
+
+
+@pytest.fixture(scope='module')
+def state():
+    return synthetic_state(6)
+
+
+def _by_position(report):
+    """Report 에서 공정 id 를 순번으로 바꾸고 사진(마지막 필드)을 뺀다"""
+    positions = {process.id: idx for idx, process in enumerate(report.processes)}
+    return report._replace(
+        processes=tuple(process._replace(id=positions[process.id]) for process in report.processes),
+        hazard_classifications={positions[process_id]: classification
+                                for process_id, classification in report.hazard_classifications.items()},
+    )[:-1]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_round_trip(state, engine):
+    imported = import_workbook(build_workbook(state, REPORT_SHEETS, engine=engine))
+    assert _by_position(report_from_state(imported)) == _by_position(report_from_state(state))
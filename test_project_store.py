@@ -0,0 +1,75 @@
+"""project_store 저장/불러오기 - 손상된 프로젝트 파일은 ValueError 로 알린다
+
+화면의 불러오기는 ValueError 만 받아 오류 메시지로 보여 주므로, 모양이 어긋난
+파일이 다른 예외로 새어 나가면 사이드바 콜백이 통째로 멈춘다.
+
+    python -m pytest -q test_project_store.py
+"""
+import json
+from io import BytesIO
+from zipfile import ZipFile
+
+import pytest
+
+from benchmark import synthetic_state
+from project_store import PROJECT_JSON, load_project, restore_state, save_project
+from report_model import report_from_state
+
+
+@pytest.fixture(scope='module')
+def state():
+    return synthetic_state(3, photo_count=1)
+
+
+@pytest.fixture(scope='module')
+def project(state):
+    return save_project(state)
+
+
+@pytest.fixture(scope='module')
+def snapshot(project):
+    return json.loads(ZipFile(BytesIO(project)).read(PROJECT_JSON))
+
+
+def _pack(snapshot):
+    output = BytesIO()
+    with ZipFile(output, 'w') as archive:
+        archive.writestr(PROJECT_JSON, json.dumps(snapshot, ensure_ascii=False))
+    return output.getvalue()
+
+
+def test_round_trip(state, project):
+    loaded = load_project(project)
+    # 마지막 필드(photos)는 PhotoStore 객체이므로 사진은 해시로 따로 비교한다
+    assert report_from_state(loaded)[:-1] == report_from_state(state)[:-1]
+    assert set(loaded['photos'].photos) == set(state['photos'].photos)
+
+
+def test_yes_no_values_are_normalized(snapshot):
+    processes = {**snapshot['processes'], 'contract': ['O', ' 없음 ', '보류'], 'permit': ['', '유', None]}
+    loaded = restore_state({**snapshot, 'processes': processes})['processes']
+    # 흔한 표기는 유/무로 바꾸고, 알 수 없는 값은 지우지 않는다
+    assert loaded.column('contract') == ['유', '무', '보류']
+    assert loaded.column('permit') == ['', '유', '']
+
+
+MALFORMED = {
+    'top_level_list': lambda snapshot: [snapshot],
+    'processes_list': lambda snapshot: {**snapshot, 'processes': [1, 2]},
+    'column_not_list': lambda snapshot: {**snapshot, 'processes': {**snapshot['processes'], 'name': '공정'}},
+    'ragged_columns': lambda snapshot: {**snapshot, 'processes': {**snapshot['processes'], 'name': ['공정']}},
+    'form_data_list': lambda snapshot: {**snapshot, 'form_data': ['회사']},
+    'approvers_not_list': lambda snapshot: {**snapshot, 'form_data': {**snapshot['form_data'], 'approvers': '대표'}},
+    'hazard_info_list': lambda snapshot: {**snapshot, 'hazard_info': []},
+    'classification_not_dict': lambda snapshot: {**snapshot, 'hazard_classifications': {'p': 3}},
+    'checked_not_list': lambda snapshot: {**snapshot, 'hazard_classifications': {'p': {'checked': 5}}},
+    'photo_size': lambda snapshot: {**snapshot, 'photos': {'d': 5}},
+    'version_str': lambda snapshot: {**snapshot, 'version': '2'},
+    'evaluation_date_int': lambda snapshot: {**snapshot, 'business_info': {'evaluation_date': 20240102}},
+}
+
+
+@pytest.mark.parametrize('case', MALFORMED)
+def test_malformed_project_raises_value_error(snapshot, case):
+    with pytest.raises(ValueError):
+        load_project(_pack(MALFORMED[case](snapshot)))
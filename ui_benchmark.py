@@ -0,0 +1,156 @@
+"""화면 재실행 지연 벤치마크
+
+streamlit.testing.v1.AppTest 로 app.py 를 브라우저 없이 실행한다. 공정 N 개짜리
+가짜 프로젝트(benchmark.synthetic_state)를 세션 상태에 넣고, 자주 하는 조작마다
+스크립트 재실행에 걸린 시간과 화면 요소 수를 잰다. 공정 수를 늘려 가며 재면
+버전마다 '공정 수 - 지연' 곡선을 비교할 수 있다.
+
+    python ui_benchmark.py --sizes 10 50 200 -o ui_bench.json
+    python ui_benchmark.py --sizes 10 50 200 --compare ui_bench.json
+
+조작: 그대로 다시 실행 / 공정설명 입력 / 유해위험요인 체크 / ➕ 공정 추가.
+AppTest 는 fragment 만 다시 실행하지 못하고 매번 스크립트 전체를 실행하므로,
+fragment 안의 조작도 전체 재실행 시간(가장 느린 경우)으로 잰다. 시간에는
+AppTest 가 화면 요소를 주고받는 비용도 들어 있다.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmark import DEFAULT_THRESHOLD, compare, synthetic_state
+from hazard_taxonomy import TAXONOMY
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+DEFAULT_SIZES = (10, 50, 200)
+INTERACTIONS = ('rerun', 'type_description', 'tick_hazard', 'add_process')
+
+RESULT_KEYS = ('processes', 'interaction')
+RESULT_METRICS = ('seconds_median', 'elements')
+
+
+def count_elements(node, counts):
+    """화면 요소 종류별 개수를 counts 에 더한다"""
+    children = getattr(node, 'children', None)
+    if children is None:
+        kind = type(node).__name__
+        counts[kind] = counts.get(kind, 0) + 1
+        return
+    for child in children.values():
+        count_elements(child, counts)
+
+
+def _interact(at, interaction, step):
+    """조작 하나를 걸고 (실행은 하지 않음) AppTest 를 돌려준다"""
+    process_id = at.session_state.processes[0]['id']
+    if interaction == 'rerun':
+        return at
+    if interaction == 'type_description':
+        return at.text_area(key=f'process_desc_{process_id}').input(f'공정 설명 수정 {step}')
+    if interaction == 'tick_hazard':
+        item = TAXONOMY.items[step % len(TAXONOMY)]
+        checkbox = at.checkbox(key=f'cb_{process_id}_{item.key}')
+        return checkbox.set_value(not checkbox.value)
+    if interaction == 'add_process':
+        return at.button[[button.label for button in at.button].index('➕ 공정 추가')].click()
+    raise ValueError(f"알 수 없는 조작: {interaction}")
+
+
+def measure_size(process_count, interactions=INTERACTIONS, repeat=3, timeout=600, seed=0):
+    """공정 process_count 개에서 조작별 결과 dict 목록 (첫 실행은 'initial')"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for key, value in synthetic_state(process_count, seed=seed).items():
+        at.session_state[key] = value
+
+    def timed_run(runner):
+        started = time.perf_counter()
+        runner.run()
+        seconds = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(f"app.py 실행 중 오류: {at.exception[0].message}")
+        return seconds
+
+    def result(interaction, seconds):
+        counts = {}
+        count_elements(at.main, counts)
+        count_elements(at.sidebar, counts)
+        return {
+            'processes': process_count,
+            'interaction': interaction,
+            'seconds_min': round(min(seconds), 4),
+            'seconds_median': round(statistics.median(seconds), 4),
+            'elements': sum(counts.values()),
+            'element_types': dict(sorted(counts.items())),
+        }
+
+    results = [result('initial', [timed_run(at)])]
+    for interaction in interactions:
+        seconds = [timed_run(_interact(at, interaction, step)) for step in range(repeat)]
+        results.append(result(interaction, seconds))
+    return results
+
+
+def run(sizes=DEFAULT_SIZES, interactions=INTERACTIONS, repeat=3, timeout=600, seed=0, log=None):
+    """벤치마크 결과 dict (json 으로 저장할 수 있는 형태)"""
+    import streamlit
+
+    results = []
+    # 자동 저장은 실제 재실행 비용이므로 끄지 않고 임시 파일에 쓴다
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['RISK_AUTOSAVE_DB'] = os.path.join(directory, 'autosave.sqlite3')
+        for size in sizes:
+            for entry in measure_size(size, interactions, repeat, timeout, seed):
+                results.append(entry)
+                if log:
+                    log(entry)
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'streamlit': streamlit.__version__,
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def _print_result(result):
+    print(f"{result['processes']:>6}공정  {result['interaction']:<17} {result['seconds_min']:>8.3f}초 "
+          f"(중앙 {result['seconds_median']:.3f})  요소 {result['elements']:>6}개")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="화면 재실행 지연 벤치마크 (AppTest)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="공정 수")
+    parser.add_argument('--interactions', nargs='+', choices=INTERACTIONS, default=list(INTERACTIONS))
+    parser.add_argument('--repeat', type=int, default=3, help="조작마다 반복 수")
+    parser.add_argument('--timeout', type=float, default=600, help="재실행 한 번의 제한 시간 (초)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="결과 json 파일")
+    parser.add_argument('--compare', help="기준 결과 json - 느려진 항목이 있으면 종료 코드 1")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="느려진 것으로 보는 배수 (기본 %(default)s)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.interactions, args.repeat, args.timeout, args.seed, log=_print_result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, args.threshold, RESULT_KEYS, RESULT_METRICS)
+        for result, metric, before, after in regressions:
+            print(f"느려짐  {result['processes']}공정 {result['interaction']} {metric}: {before} -> {after}",
+                  file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())